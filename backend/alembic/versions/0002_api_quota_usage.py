@@ -0,0 +1,30 @@
+"""api quota usage
+
+Revision ID: 0002_api_quota_usage
+Revises: 0001_initial
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_api_quota_usage"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "api_quota_usage",
+        sa.Column("usage_date", sa.Date(), nullable=False),
+        sa.Column("endpoint", sa.String(length=64), nullable=False),
+        sa.Column("units", sa.Integer(), nullable=False),
+        sa.Column("calls", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("usage_date", "endpoint"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("api_quota_usage")
@@ -0,0 +1,37 @@
+"""work leases
+
+Revision ID: 0003_work_leases
+Revises: 0002_api_quota_usage
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_work_leases"
+down_revision = "0002_api_quota_usage"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "work_leases",
+        sa.Column("job_kind", sa.String(length=32), nullable=False),
+        sa.Column(
+            "tracker_id",
+            sa.Integer(),
+            sa.ForeignKey("trackers.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("owner", sa.String(length=128), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("job_kind", "tracker_id"),
+    )
+    op.create_index("ix_work_leases_expires", "work_leases", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_work_leases_expires", table_name="work_leases")
+    op.drop_table("work_leases")
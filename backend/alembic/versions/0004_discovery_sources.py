@@ -0,0 +1,30 @@
+"""discovery sources
+
+Revision ID: 0004_discovery_sources
+Revises: 0003_work_leases
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0004_discovery_sources"
+down_revision = "0003_work_leases"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "discovery_sources",
+        sa.Column("source_key", sa.String(length=300), primary_key=True),
+        sa.Column("video_ids", postgresql.ARRAY(sa.String(length=32)), nullable=False),
+        sa.Column("requested_limit", sa.Integer(), nullable=False),
+        sa.Column("fetched_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("discovery_sources")
@@ -0,0 +1,23 @@
+"""cache uploads playlist per discovery source
+
+Revision ID: 0005_discovery_uploads_playlist
+Revises: 0004_discovery_sources
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_discovery_uploads_playlist"
+down_revision = "0004_discovery_sources"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("discovery_sources", sa.Column("uploads_playlist_id", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("discovery_sources", "uploads_playlist_id")
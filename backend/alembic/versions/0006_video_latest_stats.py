@@ -0,0 +1,43 @@
+"""video latest stats
+
+Revision ID: 0006_video_latest_stats
+Revises: 0005_discovery_uploads_playlist
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006_video_latest_stats"
+down_revision = "0005_discovery_uploads_playlist"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "video_latest_stats",
+        sa.Column(
+            "video_id",
+            sa.String(length=32),
+            sa.ForeignKey("videos.video_id"),
+            primary_key=True,
+        ),
+        sa.Column("captured_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("view_count", sa.Integer(), nullable=True),
+        sa.Column("like_count", sa.Integer(), nullable=True),
+        sa.Column("comment_count", sa.Integer(), nullable=True),
+    )
+    op.execute(
+        """
+        INSERT INTO video_latest_stats (video_id, captured_at, view_count, like_count, comment_count)
+        SELECT DISTINCT ON (video_id) video_id, captured_at, view_count, like_count, comment_count
+        FROM video_snapshots
+        ORDER BY video_id, captured_at DESC
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("video_latest_stats")
@@ -0,0 +1,45 @@
+"""materialized tracker leaderboards
+
+Revision ID: 0007_tracker_leaderboards
+Revises: 0006_video_latest_stats
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_tracker_leaderboards"
+down_revision = "0006_video_latest_stats"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("trackers", sa.Column("leaderboard_computed_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_table(
+        "tracker_leaderboard_entries",
+        sa.Column(
+            "tracker_id",
+            sa.Integer(),
+            sa.ForeignKey("trackers.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column(
+            "video_id",
+            sa.String(length=32),
+            sa.ForeignKey("videos.video_id"),
+            nullable=False,
+        ),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("view_count", sa.Integer(), nullable=True),
+        sa.Column("like_count", sa.Integer(), nullable=True),
+        sa.Column("comment_count", sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint("tracker_id", "rank"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("tracker_leaderboard_entries")
+    op.drop_column("trackers", "leaderboard_computed_at")
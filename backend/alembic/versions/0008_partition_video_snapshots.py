@@ -0,0 +1,110 @@
+"""partition video_snapshots by month
+
+Revision ID: 0008_partition_video_snapshots
+Revises: 0007_tracker_leaderboards
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "0008_partition_video_snapshots"
+down_revision = "0007_tracker_leaderboards"
+branch_labels = None
+depends_on = None
+
+# Months created past the current one; the worker keeps extending this window.
+PARTITION_MONTHS_AHEAD = 2
+
+
+def _create_snapshot_indexes() -> None:
+    op.create_index("ix_snapshots_video_time", "video_snapshots", ["video_id", "captured_at"])
+    op.create_index("ix_snapshots_time", "video_snapshots", ["captured_at"])
+
+
+def upgrade() -> None:
+    op.drop_index("ix_snapshots_time", table_name="video_snapshots")
+    op.drop_index("ix_snapshots_video_time", table_name="video_snapshots")
+    op.execute("ALTER TABLE video_snapshots RENAME TO video_snapshots_unpartitioned")
+    op.execute("ALTER TABLE video_snapshots_unpartitioned RENAME CONSTRAINT uq_video_captured TO uq_video_captured_unpartitioned")
+    op.execute("ALTER TABLE video_snapshots_unpartitioned RENAME CONSTRAINT video_snapshots_pkey TO video_snapshots_unpartitioned_pkey")
+
+    op.execute(
+        """
+        CREATE TABLE video_snapshots (
+            id INTEGER NOT NULL DEFAULT nextval('video_snapshots_id_seq'),
+            video_id VARCHAR(32) NOT NULL REFERENCES videos (video_id),
+            captured_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            view_count INTEGER,
+            like_count INTEGER,
+            comment_count INTEGER,
+            CONSTRAINT video_snapshots_pkey PRIMARY KEY (id, captured_at),
+            CONSTRAINT uq_video_captured UNIQUE (video_id, captured_at)
+        ) PARTITION BY RANGE (captured_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE video_snapshots_id_seq OWNED BY video_snapshots.id")
+    _create_snapshot_indexes()
+
+    # One partition per UTC month from the oldest stored snapshot through PARTITION_MONTHS_AHEAD.
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            partition_start timestamptz;
+        BEGIN
+            FOR partition_start IN
+                SELECT generate_series(
+                    date_trunc('month', COALESCE(MIN(captured_at), now()) AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+                    date_trunc('month', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+                        + interval '{PARTITION_MONTHS_AHEAD} months',
+                    interval '1 month'
+                )
+                FROM video_snapshots_unpartitioned
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF video_snapshots FOR VALUES FROM (%L) TO (%L)',
+                    'video_snapshots_p' || to_char(partition_start AT TIME ZONE 'UTC', 'YYYYMM'),
+                    partition_start,
+                    partition_start + interval '1 month'
+                );
+            END LOOP;
+        END $$
+        """
+    )
+
+    op.execute(
+        "INSERT INTO video_snapshots (id, video_id, captured_at, view_count, like_count, comment_count) "
+        "SELECT id, video_id, captured_at, view_count, like_count, comment_count FROM video_snapshots_unpartitioned"
+    )
+    op.drop_table("video_snapshots_unpartitioned")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE video_snapshots RENAME TO video_snapshots_partitioned")
+    op.drop_index("ix_snapshots_time", table_name="video_snapshots_partitioned")
+    op.drop_index("ix_snapshots_video_time", table_name="video_snapshots_partitioned")
+    op.execute("ALTER TABLE video_snapshots_partitioned RENAME CONSTRAINT uq_video_captured TO uq_video_captured_partitioned")
+    op.execute("ALTER TABLE video_snapshots_partitioned RENAME CONSTRAINT video_snapshots_pkey TO video_snapshots_partitioned_pkey")
+
+    op.execute(
+        """
+        CREATE TABLE video_snapshots (
+            id INTEGER NOT NULL DEFAULT nextval('video_snapshots_id_seq'),
+            video_id VARCHAR(32) NOT NULL REFERENCES videos (video_id),
+            captured_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            view_count INTEGER,
+            like_count INTEGER,
+            comment_count INTEGER,
+            CONSTRAINT video_snapshots_pkey PRIMARY KEY (id),
+            CONSTRAINT uq_video_captured UNIQUE (video_id, captured_at)
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE video_snapshots_id_seq OWNED BY video_snapshots.id")
+    _create_snapshot_indexes()
+    op.execute(
+        "INSERT INTO video_snapshots (id, video_id, captured_at, view_count, like_count, comment_count) "
+        "SELECT id, video_id, captured_at, view_count, like_count, comment_count FROM video_snapshots_partitioned"
+    )
+    op.drop_table("video_snapshots_partitioned")
@@ -0,0 +1,68 @@
+"""video daily stats rollup
+
+Revision ID: 0009_video_daily_stats
+Revises: 0008_partition_video_snapshots
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009_video_daily_stats"
+down_revision = "0008_partition_video_snapshots"
+branch_labels = None
+depends_on = None
+
+ROLLUP_METRICS = ("view_count", "like_count", "comment_count")
+
+
+def upgrade() -> None:
+    metric_columns = []
+    for metric in ROLLUP_METRICS:
+        metric_columns += [
+            sa.Column(f"{metric}_first", sa.Integer(), nullable=True),
+            sa.Column(f"{metric}_last", sa.Integer(), nullable=True),
+            sa.Column(f"{metric}_max", sa.Integer(), nullable=True),
+            sa.Column(f"{metric}_delta", sa.Integer(), sa.Computed(f"{metric}_last - {metric}_first")),
+        ]
+
+    op.create_table(
+        "video_daily_stats",
+        sa.Column(
+            "video_id",
+            sa.String(length=32),
+            sa.ForeignKey("videos.video_id"),
+            nullable=False,
+        ),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("first_captured_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_captured_at", sa.DateTime(timezone=True), nullable=False),
+        *metric_columns,
+        sa.PrimaryKeyConstraint("video_id", "day"),
+    )
+
+    metric_selects = ",\n            ".join(
+        f"(array_agg({metric} ORDER BY captured_at))[1], "
+        f"(array_agg({metric} ORDER BY captured_at DESC))[1], "
+        f"max({metric})"
+        for metric in ROLLUP_METRICS
+    )
+    metric_targets = ", ".join(f"{metric}_first, {metric}_last, {metric}_max" for metric in ROLLUP_METRICS)
+    op.execute(
+        f"""
+        INSERT INTO video_daily_stats (video_id, day, first_captured_at, last_captured_at, {metric_targets})
+        SELECT
+            video_id,
+            (captured_at AT TIME ZONE 'UTC')::date,
+            min(captured_at),
+            max(captured_at),
+            {metric_selects}
+        FROM video_snapshots
+        GROUP BY video_id, (captured_at AT TIME ZONE 'UTC')::date
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("video_daily_stats")
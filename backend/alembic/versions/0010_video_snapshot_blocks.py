@@ -0,0 +1,37 @@
+"""cold-tier snapshot blocks
+
+Revision ID: 0010_video_snapshot_blocks
+Revises: 0009_video_daily_stats
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010_video_snapshot_blocks"
+down_revision = "0009_video_daily_stats"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "video_snapshot_blocks",
+        sa.Column(
+            "video_id",
+            sa.String(length=32),
+            sa.ForeignKey("videos.video_id"),
+            nullable=False,
+        ),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("sample_count", sa.Integer(), nullable=False),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint("video_id", "day"),
+    )
+    # Payloads are already zlib-compressed; skip TOAST compression attempts.
+    op.execute("ALTER TABLE video_snapshot_blocks ALTER COLUMN payload SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    op.drop_table("video_snapshot_blocks")
@@ -0,0 +1,34 @@
+"""shared channel metadata
+
+Revision ID: 0011_channels
+Revises: 0010_video_snapshot_blocks
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011_channels"
+down_revision = "0010_video_snapshot_blocks"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "channels",
+        sa.Column("channel_id", sa.String(length=64), primary_key=True),
+        sa.Column("title", sa.String(length=500), nullable=True),
+        sa.Column("handle", sa.String(length=255), nullable=True),
+        sa.Column("thumbnail_url", sa.String(length=1000), nullable=True),
+        sa.Column("is_found", sa.Boolean(), nullable=False),
+        sa.Column("fetched_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_channels_expires", "channels", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_channels_expires", table_name="channels")
+    op.drop_table("channels")
@@ -0,0 +1,29 @@
+"""channel handle resolution cache
+
+Revision ID: 0012_channel_handles
+Revises: 0011_channels
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0012_channel_handles"
+down_revision = "0011_channels"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "channel_handles",
+        sa.Column("handle", sa.String(length=255), primary_key=True),
+        sa.Column("channel_id", sa.String(length=64), nullable=True),
+        sa.Column("resolved_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("channel_handles")
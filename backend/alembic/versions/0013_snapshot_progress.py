@@ -0,0 +1,34 @@
+"""snapshot tick progress ledger
+
+Revision ID: 0013_snapshot_progress
+Revises: 0012_channel_handles
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0013_snapshot_progress"
+down_revision = "0012_channel_handles"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "snapshot_progress",
+        sa.Column(
+            "tracker_id",
+            sa.Integer(),
+            sa.ForeignKey("trackers.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("captured_at_bucket", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_video_id", sa.String(length=32), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("snapshot_progress")
@@ -1,5 +1,7 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from yta_core.db.async_session import AsyncSessionFactory
 from yta_core.db.session import SessionFactory
 
 def get_database_session() -> Generator[Session, None, None]:
@@ -8,3 +10,7 @@ def get_database_session() -> Generator[Session, None, None]:
         yield database_session
     finally:
         database_session.close()
+
+async def get_async_database_session() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionFactory() as database_session:
+        yield database_session
@@ -2,6 +2,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from yta_api.settings import ApiSettings
+from yta_api.services.channel_cache import get_channel_metadata_cache
+from yta_api.services.result_cache import get_result_cache
 from yta_api.routes.trackers import router as trackers_router
 from yta_api.routes.videos import router as videos_router
 from yta_api.routes.channels import router as channels_router
@@ -22,6 +24,14 @@ app.add_middleware(
 def health_check() -> dict[str, bool]:
     return {"ok": True}
 
+@app.get("/cache/stats")
+def result_cache_stats() -> dict[str, int]:
+    return get_result_cache().stats()
+
+@app.get("/cache/channels/stats")
+def channel_metadata_cache_stats() -> dict[str, int]:
+    return get_channel_metadata_cache().stats()
+
 app.include_router(trackers_router)
 app.include_router(videos_router)
 app.include_router(channels_router)
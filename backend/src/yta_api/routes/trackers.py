@@ -1,41 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
-from sqlalchemy.orm import Session
-
-from yta_api.db import get_database_session
-from yta_api.schemas import TrackerCreate, TrackerOut, TrackerPatch, VideoTopItem
-from yta_api.services.default_user import get_or_create_default_user
-from yta_api.services.ranking_service import compute_top_videos
-from yta_api.settings import ApiSettings
-from yta_core.youtube.client import YouTubeClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from yta_api.db import get_async_database_session
+from yta_api.schemas import TrackerCreate, TrackerOut, TrackerPatch, TrackerTopResult, VideoTopItem
+from yta_api.services.channel_resolution import resolve_channel_identifiers
+from yta_api.services.default_user import get_or_create_default_user_async
+from yta_api.services.export_service import ExportFormat, iter_csv, iter_ndjson, iter_tracker_snapshot_rows
+from yta_api.services.ranking_service import get_top_videos_async, get_top_videos_for_trackers_async
+from yta_api.services.result_cache import (
+    RESULT_CACHE_CONTROL,
+    etag_matches,
+    get_result_cache,
+    make_etag,
+    tracker_top_cache_key,
+)
 from yta_core.db.models import Tracker
+from yta_core.db.notifications import tracker_changes_notification
+from yta_core.ranking import refresh_tracker_leaderboard
 
 router = APIRouter(prefix="/trackers", tags=["trackers"])
 
-@router.post("", response_model=TrackerOut)
-def create_tracker(payload: TrackerCreate, database_session: Session = Depends(get_database_session)) -> Tracker:
-    default_user = get_or_create_default_user(database_session)
-
-    if payload.type.value == "channel" and not payload.channel_id:
-        raise HTTPException(status_code=400, detail="channel_id is required for channel trackers")
-    if payload.type.value == "search" and not payload.search_query:
-        raise HTTPException(status_code=400, detail="search_query is required for search trackers")
-
-
-    if payload.type.value == "channel":
-        api_settings = ApiSettings()
-        youtube_client = YouTubeClient(api_settings.youtube_api_key)
-
-        resolved_channel_id = youtube_client.resolve_channel_id(payload.channel_id or "")
-        if not resolved_channel_id:
-            raise HTTPException(
-                status_code=400,
-                detail="Could not resolve channel identifier. Use a UC… channel id, an @handle, or a channel URL.",
-            )
-        payload = payload.model_copy(update={"channel_id": resolved_channel_id})
+MAX_BATCH_TRACKER_IDS = 100
+MAX_BULK_CREATE_TRACKERS = 500
 
-    tracker = Tracker(
-        owner_user_id=default_user.id,
+def _build_tracker(owner_user_id: int, payload: TrackerCreate) -> Tracker:
+    return Tracker(
+        owner_user_id=owner_user_id,
         type=payload.type,
         channel_id=payload.channel_id,
         search_query=payload.search_query,
@@ -44,54 +37,224 @@ def create_tracker(payload: TrackerCreate, database_session: Session = Depends(g
         ranking_metric=payload.ranking_metric,
         ranking_window_hours=payload.ranking_window_hours,
         discovery_interval_hours=1 if payload.type.value == "channel" else 24,
-        snapshot_interval_hours=1,
+        snapshot_interval_hours=payload.snapshot_interval_hours,
         is_active=True,
     )
 
-    database_session.add(tracker)
-    database_session.commit()
-    database_session.refresh(tracker)
-    return tracker
+async def _insert_trackers(database_session: AsyncSession, payloads: list[TrackerCreate]) -> list[Tracker]:
+    default_user = await get_or_create_default_user_async(database_session)
+    trackers = [_build_tracker(default_user.id, payload) for payload in payloads]
+
+    database_session.add_all(trackers)
+    await database_session.flush()
+    await database_session.execute(tracker_changes_notification([tracker.id for tracker in trackers]))
+    await database_session.commit()
+    # One round trip reloads server defaults (created_at) for the whole batch.
+    await database_session.execute(
+        select(Tracker)
+        .where(Tracker.id.in_([tracker.id for tracker in trackers]))
+        .execution_options(populate_existing=True)
+    )
+    return trackers
+
+def _validate_tracker_create(payload: TrackerCreate) -> None:
+    if payload.type.value == "channel" and not payload.channel_id:
+        raise HTTPException(status_code=400, detail="channel_id is required for channel trackers")
+    if payload.type.value == "search" and not payload.search_query:
+        raise HTTPException(status_code=400, detail="search_query is required for search trackers")
+
+async def _with_resolved_channel_ids(
+    database_session: AsyncSession, payloads: list[TrackerCreate]
+) -> list[TrackerCreate]:
+    """Payloads with channel identifiers replaced by UC... IDs.
+
+    503 naming the identifiers whose lookup failed (answers that did arrive are cached for the
+    retry), then 400 naming any that resolved to no channel.
+    """
+    channel_identifiers = [payload.channel_id or "" for payload in payloads if payload.type.value == "channel"]
+    if not channel_identifiers:
+        return payloads
+
+    channel_id_by_identifier, failed_identifiers = await resolve_channel_identifiers(
+        database_session, channel_identifiers
+    )
+    if failed_identifiers:
+        raise HTTPException(
+            status_code=503,
+            detail=(
+                "YouTube lookup failed for channel identifier "
+                f"{', '.join(failed_identifiers)}. Retry the request; identifiers already resolved are cached."
+            ),
+        )
+    unresolved_identifiers = [
+        channel_identifier
+        for channel_identifier, channel_id in channel_id_by_identifier.items()
+        if not channel_id
+    ]
+    if unresolved_identifiers:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                "Could not resolve channel identifier "
+                f"{', '.join(unresolved_identifiers)}. Use a UC… channel id, an @handle, or a channel URL."
+            ),
+        )
+    return [
+        payload.model_copy(update={"channel_id": channel_id_by_identifier[payload.channel_id or ""]})
+        if payload.type.value == "channel"
+        else payload
+        for payload in payloads
+    ]
+
+@router.post("", response_model=TrackerOut)
+async def create_tracker(
+    payload: TrackerCreate, database_session: AsyncSession = Depends(get_async_database_session)
+) -> Tracker:
+    _validate_tracker_create(payload)
+    resolved_payloads = await _with_resolved_channel_ids(database_session, [payload])
+    return (await _insert_trackers(database_session, resolved_payloads))[0]
+
+@router.post("/bulk", response_model=list[TrackerOut])
+async def create_trackers(
+    payloads: list[TrackerCreate], database_session: AsyncSession = Depends(get_async_database_session)
+) -> list[Tracker]:
+    """Create many trackers in one transaction; handles are resolved together, uncached ones concurrently."""
+    if not payloads or len(payloads) > MAX_BULK_CREATE_TRACKERS:
+        raise HTTPException(status_code=400, detail=f"send 1 to {MAX_BULK_CREATE_TRACKERS} trackers")
+    for payload in payloads:
+        _validate_tracker_create(payload)
+    resolved_payloads = await _with_resolved_channel_ids(database_session, payloads)
+    return await _insert_trackers(database_session, resolved_payloads)
+
+def _video_top_item(row: dict) -> VideoTopItem:
+    return VideoTopItem(
+        video_id=row["video_id"],
+        title=row.get("title"),
+        channel_id=row.get("channel_id"),
+        published_at=row.get("published_at"),
+        score=float(row.get("score") or 0.0),
+        latest_view_count=row.get("view_count"),
+        latest_like_count=row.get("like_count"),
+        latest_comment_count=row.get("comment_count"),
+    )
+
+def _parse_tracker_ids(raw_ids: str) -> list[int]:
+    try:
+        tracker_ids = [int(raw_id) for raw_id in raw_ids.split(",") if raw_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of tracker IDs")
+    if not tracker_ids or len(tracker_ids) > MAX_BATCH_TRACKER_IDS:
+        raise HTTPException(status_code=400, detail=f"ids must list 1 to {MAX_BATCH_TRACKER_IDS} tracker IDs")
+    return list(dict.fromkeys(tracker_ids))
 
 @router.get("", response_model=list[TrackerOut])
-def list_trackers(database_session: Session = Depends(get_database_session)) -> list[Tracker]:
-    default_user = get_or_create_default_user(database_session)
-    return (
-        database_session.execute(
-            select(Tracker).where(Tracker.owner_user_id == default_user.id).order_by(Tracker.created_at.desc())
+async def list_trackers(database_session: AsyncSession = Depends(get_async_database_session)) -> list[Tracker]:
+    default_user = await get_or_create_default_user_async(database_session)
+    return list(
+        (
+            await database_session.execute(
+                select(Tracker).where(Tracker.owner_user_id == default_user.id).order_by(Tracker.created_at.desc())
+            )
         )
         .scalars()
         .all()
     )
 
+@router.get("/top", response_model=list[TrackerTopResult])
+async def trackers_top(
+    ids: str, database_session: AsyncSession = Depends(get_async_database_session)
+) -> list[TrackerTopResult]:
+    """Leaderboards for many trackers at once, e.g. `/trackers/top?ids=1,2,3`, in request order."""
+    tracker_ids = _parse_tracker_ids(ids)
+    top_rows_by_tracker = await get_top_videos_for_trackers_async(database_session, tracker_ids)
+    return [
+        TrackerTopResult(
+            tracker_id=tracker_id,
+            items=[_video_top_item(row) for row in top_rows_by_tracker[tracker_id]],
+        )
+        for tracker_id in tracker_ids
+    ]
+
 @router.patch("/{tracker_id}", response_model=TrackerOut)
-def patch_tracker(tracker_id: int, payload: TrackerPatch, database_session: Session = Depends(get_database_session)) -> Tracker:
-    default_user = get_or_create_default_user(database_session)
-    tracker: Tracker | None = database_session.get(Tracker, tracker_id)
+async def patch_tracker(
+    tracker_id: int, payload: TrackerPatch, database_session: AsyncSession = Depends(get_async_database_session)
+) -> Tracker:
+    default_user = await get_or_create_default_user_async(database_session)
+    tracker: Tracker | None = await database_session.get(Tracker, tracker_id)
     if tracker is None or tracker.owner_user_id != default_user.id:
         raise HTTPException(status_code=404, detail="Tracker not found")
 
-    for field_name, field_value in payload.model_dump(exclude_unset=True).items():
+    patched_fields = payload.model_dump(exclude_unset=True)
+    for field_name, field_value in patched_fields.items():
         setattr(tracker, field_name, field_value)
 
+    if "snapshot_interval_hours" in patched_fields:
+        # Let the worker reschedule from the new cadence on its next tick.
+        tracker.next_snapshot_at = None
+
+    if patched_fields.keys() & {"ranking_metric", "ranking_window_hours", "top_n", "is_active"}:
+        await database_session.run_sync(refresh_tracker_leaderboard, tracker)
+
     database_session.add(tracker)
-    database_session.commit()
-    database_session.refresh(tracker)
+    await database_session.execute(tracker_changes_notification([tracker_id]))
+    await database_session.commit()
+    get_result_cache().invalidate("tracker_top", tracker_id)
+    await database_session.refresh(tracker)
     return tracker
 
 @router.get("/{tracker_id}/top", response_model=list[VideoTopItem])
-def tracker_top(tracker_id: int, database_session: Session = Depends(get_database_session)) -> list[VideoTopItem]:
-    computed_rows = compute_top_videos(database_session, tracker_id)
-    return [
-        VideoTopItem(
-            video_id=row["video_id"],
-            title=row.get("title"),
-            channel_id=row.get("channel_id"),
-            published_at=row.get("published_at"),
-            score=float(row.get("score") or 0.0),
-            latest_view_count=row.get("view_count"),
-            latest_like_count=row.get("like_count"),
-            latest_comment_count=row.get("comment_count"),
-        )
-        for row in computed_rows
-    ]
+async def tracker_top(
+    tracker_id: int,
+    request: Request,
+    response: Response,
+    database_session: AsyncSession = Depends(get_async_database_session),
+) -> list[VideoTopItem] | Response:
+    cache_key = await database_session.run_sync(tracker_top_cache_key, tracker_id)
+    cache_headers = {"ETag": make_etag(cache_key), "Cache-Control": RESULT_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), cache_headers["ETag"]):
+        return Response(status_code=304, headers=cache_headers)
+    response.headers.update(cache_headers)
+
+    result_cache = get_result_cache()
+    cached_items = result_cache.get(cache_key)
+    if cached_items is not None:
+        return cached_items
+
+    computed_rows = await get_top_videos_async(database_session, tracker_id)
+    top_items = [_video_top_item(row) for row in computed_rows]
+    result_cache.put(cache_key, top_items)
+    return top_items
+
+def _as_utc(moment: datetime | None) -> datetime | None:
+    if moment is None or moment.tzinfo is not None:
+        return moment
+    return moment.replace(tzinfo=timezone.utc)
+
+@router.get("/{tracker_id}/export")
+async def export_tracker_snapshots(
+    tracker_id: int,
+    format: ExportFormat = "ndjson",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    database_session: AsyncSession = Depends(get_async_database_session),
+) -> StreamingResponse:
+    """Stream all snapshots of the tracker's candidates in [since, until) as NDJSON or CSV.
+
+    The rows themselves come from a sync server-side cursor, iterated off the event loop.
+    """
+    default_user = await get_or_create_default_user_async(database_session)
+    tracker: Tracker | None = await database_session.get(Tracker, tracker_id)
+    if tracker is None or tracker.owner_user_id != default_user.id:
+        raise HTTPException(status_code=404, detail="Tracker not found")
+
+    snapshot_rows = iter_tracker_snapshot_rows(tracker_id, _as_utc(since), _as_utc(until))
+    if format == "csv":
+        body, media_type = iter_csv(snapshot_rows), "text/csv"
+    else:
+        body, media_type = iter_ndjson(snapshot_rows), "application/x-ndjson"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="tracker-{tracker_id}-snapshots.{format}"'},
+    )
@@ -1,34 +1,85 @@
-from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from yta_api.db import get_database_session
-from yta_api.schemas import TimeSeriesPoint
-from yta_core.db.models import VideoSnapshot
-from yta_core.time_utils import utc_now
+from yta_api.db import get_async_database_session
+from yta_api.schemas import BulkTimeSeriesOut, TimeSeriesPoint
+from yta_api.services.result_cache import (
+    RESULT_CACHE_CONTROL,
+    etag_matches,
+    get_result_cache,
+    make_etag,
+    timeseries_cache_key,
+)
+from yta_api.services.timeseries_service import (
+    TIMESERIES_METRICS,
+    TimeseriesResolution,
+    load_bulk_timeseries_async,
+    load_timeseries_points_async,
+)
 
 router = APIRouter(prefix="/videos", tags=["videos"])
 
+MAX_BULK_VIDEO_IDS = 50
+MAX_BULK_DAYS = 90
+# Longest single-video window; anything this long is served from the daily rollup, one row per day.
+MAX_TIMESERIES_DAYS = 3650
+
+def _split_csv(raw_value: str) -> list[str]:
+    return list(dict.fromkeys(part.strip() for part in raw_value.split(",") if part.strip()))
+
+@router.get("/timeseries", response_model=BulkTimeSeriesOut)
+async def get_bulk_timeseries(
+    ids: str,
+    metrics: str = "view_count",
+    days: int = Query(default=7, ge=1, le=MAX_BULK_DAYS),
+    database_session: AsyncSession = Depends(get_async_database_session),
+) -> BulkTimeSeriesOut:
+    """Hourly series for many videos and metrics at once, e.g. `?ids=a,b&metrics=view_count,like_count`."""
+    video_ids = _split_csv(ids)
+    if not video_ids or len(video_ids) > MAX_BULK_VIDEO_IDS:
+        raise HTTPException(status_code=400, detail=f"ids must list 1 to {MAX_BULK_VIDEO_IDS} video IDs")
+
+    requested_metrics = _split_csv(metrics)
+    if not requested_metrics or any(metric not in TIMESERIES_METRICS for metric in requested_metrics):
+        raise HTTPException(
+            status_code=400, detail="metrics must be a comma-separated subset of view_count|like_count|comment_count"
+        )
+
+    timestamps, series = await load_bulk_timeseries_async(database_session, video_ids, requested_metrics, days)
+    return BulkTimeSeriesOut(timestamps=timestamps, series=series)
+
 @router.get("/{video_id}/timeseries", response_model=list[TimeSeriesPoint])
-def get_timeseries(
+async def get_timeseries(
     video_id: str,
+    request: Request,
+    response: Response,
     metric: str = "view_count",
-    days: int = 7,
-    database_session: Session = Depends(get_database_session),
-) -> list[TimeSeriesPoint]:
-    allowed_metrics = {"view_count", "like_count", "comment_count"}
-    if metric not in allowed_metrics:
+    days: int = Query(default=7, ge=1, le=MAX_TIMESERIES_DAYS),
+    resolution: TimeseriesResolution = "auto",
+    max_points: int = Query(default=500, ge=2, le=5000),
+    database_session: AsyncSession = Depends(get_async_database_session),
+) -> list[TimeSeriesPoint] | Response:
+    if metric not in TIMESERIES_METRICS:
         raise HTTPException(status_code=400, detail="metric must be view_count|like_count|comment_count")
 
-    since_time = utc_now() - timedelta(days=days)
-    metric_column = getattr(VideoSnapshot, metric)
+    cache_key = await database_session.run_sync(
+        timeseries_cache_key, video_id, metric, days, resolution, max_points
+    )
+    cache_headers = {"ETag": make_etag(cache_key), "Cache-Control": RESULT_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), cache_headers["ETag"]):
+        return Response(status_code=304, headers=cache_headers)
+    response.headers.update(cache_headers)
 
-    rows = database_session.execute(
-        select(VideoSnapshot.captured_at, metric_column)
-        .where(VideoSnapshot.video_id == video_id)
-        .where(VideoSnapshot.captured_at >= since_time)
-        .order_by(VideoSnapshot.captured_at.asc())
-    ).all()
+    result_cache = get_result_cache()
+    cached_points = result_cache.get(cache_key)
+    if cached_points is not None:
+        return cached_points
 
-    return [TimeSeriesPoint(captured_at=row[0], value=row[1]) for row in rows]
+    timeseries_points = [
+        TimeSeriesPoint(captured_at=captured_at, value=value)
+        for captured_at, value in await load_timeseries_points_async(
+            database_session, video_id, metric, days, resolution, max_points
+        )
+    ]
+    result_cache.put(cache_key, timeseries_points)
+    return timeseries_points
@@ -10,12 +10,14 @@ class TrackerCreate(BaseModel):
     candidate_pool_size: int = Field(default=200, ge=20, le=1000)
     ranking_metric: RankingMetric = RankingMetric.views
     ranking_window_hours: int | None = Field(default=None, ge=1, le=24 * 90)
+    snapshot_interval_hours: int = Field(default=1, ge=1, le=24 * 7)
 
 class TrackerPatch(BaseModel):
     top_n: int | None = Field(default=None, ge=1, le=200)
     candidate_pool_size: int | None = Field(default=None, ge=20, le=1000)
     ranking_metric: RankingMetric | None = None
     ranking_window_hours: int | None = Field(default=None, ge=1, le=24 * 90)
+    snapshot_interval_hours: int | None = Field(default=None, ge=1, le=24 * 7)
     is_active: bool | None = None
 
 class TrackerOut(BaseModel):
@@ -28,6 +30,7 @@ class TrackerOut(BaseModel):
     candidate_pool_size: int
     ranking_metric: RankingMetric
     ranking_window_hours: int | None
+    snapshot_interval_hours: int
     is_active: bool
     created_at: datetime
 
@@ -41,6 +44,14 @@ class VideoTopItem(BaseModel):
     latest_like_count: int | None
     latest_comment_count: int | None
 
+class TrackerTopResult(BaseModel):
+    tracker_id: int
+    items: list[VideoTopItem]
+
 class TimeSeriesPoint(BaseModel):
     captured_at: datetime
     value: int | None
+
+class BulkTimeSeriesOut(BaseModel):
+    timestamps: list[datetime]
+    series: dict[str, dict[str, list[int | None]]]
@@ -0,0 +1,150 @@
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from yta_api.schemas_channels import ChannelMeta
+from yta_api.settings import ApiSettings
+from yta_core.channels import load_channels
+from yta_core.time_utils import utc_now
+
+class _FillAbandoned(Exception):
+    """Set on in-flight futures whose owning request was cancelled before reading them."""
+
+class ChannelMetadataCache:
+    """Process-local LRU in front of the `channels` table, which the worker keeps populated.
+
+    Entries live for `ttl` so worker refreshes show up without a restart. A miss registers one
+    future per channel ID, so concurrent requests for the same uncached IDs share a single read;
+    if the reading request is cancelled, its waiters claim those IDs again.
+    Channels the worker has not stored yet come back with only `channel_id` set.
+    """
+
+    def __init__(self, max_entries: int, ttl: timedelta) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[datetime, ChannelMeta]] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Future[ChannelMeta]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _get_fresh(self, channel_id: str, now: datetime) -> ChannelMeta | None:
+        cached = self._entries.get(channel_id)
+        if cached is None:
+            return None
+        if cached[0] <= now:
+            del self._entries[channel_id]
+            return None
+        self._entries.move_to_end(channel_id)
+        return cached[1]
+
+    def _put(self, channel_id: str, expires_at: datetime, meta: ChannelMeta) -> None:
+        self._entries[channel_id] = (expires_at, meta)
+        self._entries.move_to_end(channel_id)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_many(self, database_session: AsyncSession, channel_ids: list[str]) -> dict[str, ChannelMeta]:
+        meta_by_channel: dict[str, ChannelMeta] = {}
+        unresolved_channel_ids = list(dict.fromkeys(channel_ids))
+        while unresolved_channel_ids:
+            unresolved_channel_ids = await self._claim_and_resolve(
+                database_session, unresolved_channel_ids, meta_by_channel
+            )
+        return meta_by_channel
+
+    async def _claim_and_resolve(
+        self, database_session: AsyncSession, channel_ids: list[str], meta_by_channel: dict[str, ChannelMeta]
+    ) -> list[str]:
+        """Serve `channel_ids` into `meta_by_channel`; returns the IDs whose owning read was abandoned."""
+        now = utc_now()
+        pending_by_channel: dict[str, asyncio.Future[ChannelMeta]] = {}
+        owned_channel_ids: list[str] = []
+
+        # No awaits until the futures are registered, so the check-and-claim is atomic on the loop.
+        for channel_id in channel_ids:
+            cached_meta = self._get_fresh(channel_id, now)
+            if cached_meta is not None:
+                self.hits += 1
+                meta_by_channel[channel_id] = cached_meta
+                continue
+
+            in_flight = self._in_flight.get(channel_id)
+            if in_flight is None:
+                self.misses += 1
+                in_flight = asyncio.get_running_loop().create_future()
+                self._in_flight[channel_id] = in_flight
+                owned_channel_ids.append(channel_id)
+            else:
+                self.coalesced += 1
+            pending_by_channel[channel_id] = in_flight
+
+        if owned_channel_ids:
+            await self._fill(database_session, owned_channel_ids, now)
+
+        abandoned_channel_ids: list[str] = []
+        for channel_id, pending_meta in pending_by_channel.items():
+            try:
+                # Shielded so this request being cancelled does not cancel a read others are awaiting.
+                meta_by_channel[channel_id] = await asyncio.shield(pending_meta)
+            except _FillAbandoned:
+                abandoned_channel_ids.append(channel_id)
+        return abandoned_channel_ids
+
+    async def _fill(self, database_session: AsyncSession, channel_ids: list[str], now: datetime) -> None:
+        """Resolve this request's claimed futures from the `channels` table."""
+        try:
+            stored_channels = await database_session.run_sync(load_channels, channel_ids)
+            for channel_id in channel_ids:
+                channel = stored_channels.get(channel_id)
+                meta = (
+                    ChannelMeta(
+                        channel_id=channel_id,
+                        title=channel.title,
+                        handle=channel.handle,
+                        thumbnail_url=channel.thumbnail_url,
+                    )
+                    if channel is not None
+                    else ChannelMeta(channel_id=channel_id)
+                )
+                self._put(channel_id, now + self._ttl, meta)
+                pending_meta = self._in_flight.pop(channel_id)
+                pending_meta.set_result(meta)
+        except Exception as exc:
+            self._fail_in_flight(channel_ids, exc)
+            raise
+        except BaseException:
+            # Cancelled (client went away): waiters on these IDs claim them again instead of failing.
+            self._fail_in_flight(channel_ids, _FillAbandoned())
+            raise
+
+    def _fail_in_flight(self, channel_ids: list[str], exc: BaseException) -> None:
+        for channel_id in channel_ids:
+            pending_meta = self._in_flight.pop(channel_id, None)
+            if pending_meta is not None and not pending_meta.done():
+                pending_meta.set_exception(exc)
+                # Waiters still see the error; this only silences "exception never retrieved".
+                pending_meta.exception()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "in_flight": len(self._in_flight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
+
+@lru_cache(maxsize=1)
+def get_channel_metadata_cache() -> ChannelMetadataCache:
+    api_settings = ApiSettings()
+    return ChannelMetadataCache(
+        api_settings.channel_meta_cache_max_entries,
+        timedelta(seconds=api_settings.channel_meta_cache_ttl_seconds),
+    )
@@ -0,0 +1,71 @@
+import asyncio
+from typing import NamedTuple
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from yta_api.services.youtube_client import get_async_youtube_client
+from yta_core.channels import handle_cache_key, load_handle_resolutions, store_handle_resolutions
+from yta_core.time_utils import utc_now
+from yta_core.youtube.client import parse_channel_identifier
+
+class ChannelResolutions(NamedTuple):
+    channel_id_by_identifier: dict[str, str | None]
+    # Identifiers whose API lookup failed (HTTP or transport error); absent from the dict above.
+    failed_identifiers: list[str]
+
+async def resolve_channel_identifiers(
+    database_session: AsyncSession, channel_identifiers: list[str]
+) -> ChannelResolutions:
+    """UC... channel ID (or None) per identifier, asking the API only for handles not cached in `channel_handles`.
+
+    Uncached handles are looked up concurrently, bounded by the shared client's concurrency limit.
+    Every answer (misses too) is written back in one commit even when other lookups failed, so a
+    retry only pays for the handles still missing.
+    """
+    now = utc_now()
+    channel_id_by_identifier: dict[str, str | None] = {}
+    failed_identifiers: list[str] = []
+    identifiers_by_handle: dict[str, list[str]] = {}
+    for channel_identifier in dict.fromkeys(channel_identifiers):
+        channel_id, handle = parse_channel_identifier(channel_identifier)
+        if channel_id or not handle:
+            channel_id_by_identifier[channel_identifier] = channel_id
+        else:
+            identifiers_by_handle.setdefault(handle_cache_key(handle), []).append(channel_identifier)
+
+    cached_resolutions = await database_session.run_sync(load_handle_resolutions, list(identifiers_by_handle), now)
+    uncached_handles: list[str] = []
+    for handle, handle_identifiers in identifiers_by_handle.items():
+        cached_resolution = cached_resolutions.get(handle)
+        if cached_resolution is None:
+            uncached_handles.append(handle)
+            continue
+        for channel_identifier in handle_identifiers:
+            channel_id_by_identifier[channel_identifier] = cached_resolution.channel_id
+
+    if uncached_handles:
+        youtube_client = get_async_youtube_client()
+        lookup_results = await asyncio.gather(
+            *(youtube_client.resolve_channel_id(handle) for handle in uncached_handles), return_exceptions=True
+        )
+        channel_id_by_handle: dict[str, str | None] = {}
+        unexpected_error: BaseException | None = None
+        for handle, lookup_result in zip(uncached_handles, lookup_results):
+            if isinstance(lookup_result, httpx.HTTPError):
+                failed_identifiers.extend(identifiers_by_handle[handle])
+            elif isinstance(lookup_result, BaseException):
+                unexpected_error = unexpected_error or lookup_result
+            else:
+                channel_id_by_handle[handle] = lookup_result
+
+        if channel_id_by_handle:
+            await database_session.run_sync(store_handle_resolutions, channel_id_by_handle, utc_now())
+            await database_session.commit()
+        if unexpected_error is not None:
+            raise unexpected_error
+        for handle, channel_id in channel_id_by_handle.items():
+            for channel_identifier in identifiers_by_handle[handle]:
+                channel_id_by_identifier[channel_identifier] = channel_id
+
+    return ChannelResolutions(channel_id_by_identifier, failed_identifiers)
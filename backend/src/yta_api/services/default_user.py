@@ -1,4 +1,5 @@
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from yta_core.db.models import User
 
@@ -17,3 +18,17 @@ def get_or_create_default_user(database_session: Session) -> User:
     database_session.commit()
     database_session.refresh(new_user)
     return new_user
+
+async def get_or_create_default_user_async(database_session: AsyncSession) -> User:
+    existing_user = (
+        await database_session.execute(select(User).where(User.email == DEFAULT_USER_EMAIL_ADDRESS))
+    ).scalar_one_or_none()
+
+    if existing_user is not None:
+        return existing_user
+
+    new_user = User(email=DEFAULT_USER_EMAIL_ADDRESS)
+    database_session.add(new_user)
+    await database_session.commit()
+    await database_session.refresh(new_user)
+    return new_user
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+def largest_triangle_three_buckets(
+    points: list[tuple[datetime, int | None]], max_points: int
+) -> list[tuple[datetime, int | None]]:
+    """Downsample a time-ordered series to at most `max_points` with LTTB.
+
+    Keeps the first and last point and, per bucket, the point forming the largest triangle with
+    the previously kept point and the next bucket's average, which preserves peaks and slopes.
+    Points without a value are dropped before sampling.
+    """
+    valued_points = [point for point in points if point[1] is not None]
+    if len(valued_points) <= max_points:
+        return valued_points
+    if max_points < 3:
+        return [valued_points[0], valued_points[-1]][:max_points]
+
+    x_values = [point[0].timestamp() for point in valued_points]
+    y_values = [float(point[1]) for point in valued_points]  # type: ignore[arg-type]
+
+    sampled_points = [valued_points[0]]
+    bucket_width = (len(valued_points) - 2) / (max_points - 2)
+    previous_index = 0
+
+    for bucket_index in range(max_points - 2):
+        bucket_start = int(bucket_index * bucket_width) + 1
+        bucket_end = int((bucket_index + 1) * bucket_width) + 1
+
+        next_bucket_start = bucket_end
+        next_bucket_end = min(int((bucket_index + 2) * bucket_width) + 1, len(valued_points))
+        if next_bucket_end > next_bucket_start:
+            next_bucket_size = next_bucket_end - next_bucket_start
+            average_x = sum(x_values[next_bucket_start:next_bucket_end]) / next_bucket_size
+            average_y = sum(y_values[next_bucket_start:next_bucket_end]) / next_bucket_size
+        else:
+            average_x, average_y = x_values[-1], y_values[-1]
+
+        previous_x, previous_y = x_values[previous_index], y_values[previous_index]
+        best_index, best_area = bucket_start, -1.0
+        for candidate_index in range(bucket_start, bucket_end):
+            triangle_area = abs(
+                (previous_x - average_x) * (y_values[candidate_index] - previous_y)
+                - (previous_x - x_values[candidate_index]) * (average_y - previous_y)
+            )
+            if triangle_area > best_area:
+                best_index, best_area = candidate_index, triangle_area
+
+        sampled_points.append(valued_points[best_index])
+        previous_index = best_index
+
+    sampled_points.append(valued_points[-1])
+    return sampled_points
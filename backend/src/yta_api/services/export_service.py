@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Iterator, Literal
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from yta_core.cold_storage import decode_snapshot_block
+from yta_core.db.models import TrackerCandidate, VideoSnapshot, VideoSnapshotBlock
+from yta_core.db.session import SessionFactory
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_COLUMNS = ("video_id", "captured_at", "view_count", "like_count", "comment_count")
+# Rows fetched per server-side cursor round trip; also the number of rows per streamed chunk.
+EXPORT_FETCH_SIZE = 5000
+
+ExportRow = tuple[str, datetime, int | None, int | None, int | None]
+
+def _iter_cold_rows(
+    database_session: Session, tracker_id: int, since_time: datetime | None, until_time: datetime | None
+) -> Iterator[ExportRow]:
+    block_query = (
+        select(VideoSnapshotBlock.video_id, VideoSnapshotBlock.day, VideoSnapshotBlock.payload)
+        .join(TrackerCandidate, TrackerCandidate.video_id == VideoSnapshotBlock.video_id)
+        .where(TrackerCandidate.tracker_id == tracker_id)
+        .order_by(VideoSnapshotBlock.video_id, VideoSnapshotBlock.day)
+        .execution_options(yield_per=EXPORT_FETCH_SIZE // 24 + 1)
+    )
+    if since_time is not None:
+        block_query = block_query.where(VideoSnapshotBlock.day >= since_time.astimezone(timezone.utc).date())
+    if until_time is not None:
+        block_query = block_query.where(VideoSnapshotBlock.day <= until_time.astimezone(timezone.utc).date())
+
+    for video_id, day, payload in database_session.execute(block_query):
+        for sample in decode_snapshot_block(day, payload):
+            if since_time is not None and sample.captured_at < since_time:
+                continue
+            if until_time is not None and sample.captured_at >= until_time:
+                continue
+            yield (video_id, sample.captured_at, sample.view_count, sample.like_count, sample.comment_count)
+
+def _iter_raw_rows(
+    database_session: Session, tracker_id: int, since_time: datetime | None, until_time: datetime | None
+) -> Iterator[ExportRow]:
+    snapshot_query = (
+        select(
+            VideoSnapshot.video_id,
+            VideoSnapshot.captured_at,
+            VideoSnapshot.view_count,
+            VideoSnapshot.like_count,
+            VideoSnapshot.comment_count,
+        )
+        .join(TrackerCandidate, TrackerCandidate.video_id == VideoSnapshot.video_id)
+        .where(TrackerCandidate.tracker_id == tracker_id)
+        .order_by(VideoSnapshot.video_id, VideoSnapshot.captured_at)
+        .execution_options(yield_per=EXPORT_FETCH_SIZE)
+    )
+    if since_time is not None:
+        snapshot_query = snapshot_query.where(VideoSnapshot.captured_at >= since_time)
+    if until_time is not None:
+        snapshot_query = snapshot_query.where(VideoSnapshot.captured_at < until_time)
+
+    for row in database_session.execute(snapshot_query):
+        yield tuple(row)  # type: ignore[misc]
+
+def iter_tracker_snapshot_rows(
+    tracker_id: int, since_time: datetime | None, until_time: datetime | None
+) -> Iterator[ExportRow]:
+    """Every snapshot of the tracker's current candidates in [since, until), compacted days first.
+
+    Rows come through server-side cursors (`yield_per`), so memory stays flat regardless of the
+    export size. The generator owns its session because it outlives the request handler.
+    """
+    with SessionFactory() as database_session:
+        yield from _iter_cold_rows(database_session, tracker_id, since_time, until_time)
+        yield from _iter_raw_rows(database_session, tracker_id, since_time, until_time)
+
+def _iter_row_chunks(rows: Iterator[ExportRow]) -> Iterator[list[ExportRow]]:
+    chunk: list[ExportRow] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= EXPORT_FETCH_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_ndjson(rows: Iterator[ExportRow]) -> Iterator[str]:
+    for chunk in _iter_row_chunks(rows):
+        yield "".join(
+            json.dumps(
+                {
+                    "video_id": video_id,
+                    "captured_at": captured_at.isoformat(),
+                    "view_count": view_count,
+                    "like_count": like_count,
+                    "comment_count": comment_count,
+                }
+            )
+            + "\n"
+            for video_id, captured_at, view_count, like_count, comment_count in chunk
+        )
+
+def iter_csv(rows: Iterator[ExportRow]) -> Iterator[str]:
+    buffer = io.StringIO()
+    csv_writer = csv.writer(buffer)
+    csv_writer.writerow(EXPORT_COLUMNS)
+    for chunk in _iter_row_chunks(rows):
+        csv_writer.writerows(
+            (video_id, captured_at.isoformat(), view_count, like_count, comment_count)
+            for video_id, captured_at, view_count, like_count, comment_count in chunk
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
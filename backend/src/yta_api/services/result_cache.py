@@ -0,0 +1,115 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Hashable
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from yta_api.settings import ApiSettings
+from yta_core.db.models import Tracker, TrackerCandidate, VideoLatestStats
+from yta_core.time_utils import hour_bucket, utc_now
+
+# Browsers keep the body but must revalidate, so a tracker patch is visible on the next request.
+RESULT_CACHE_CONTROL = "private, no-cache"
+
+class ResultCache:
+    """Bounded LRU of endpoint results keyed by (namespace, entity_id, *version parts).
+
+    Version parts include the latest snapshot bucket, so entries go stale on their own when
+    new data lands; `invalidate` drops an entity's entries early (e.g. after a tracker patch).
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[tuple, object] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, cache_key: tuple) -> object | None:
+        with self._lock:
+            cached_value = self._entries.get(cache_key)
+            if cached_value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return cached_value
+
+    def put(self, cache_key: tuple, value: object) -> None:
+        with self._lock:
+            self._entries[cache_key] = value
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, namespace: str, entity_id: Hashable) -> None:
+        with self._lock:
+            for cache_key in [key for key in self._entries if key[0] == namespace and key[1] == entity_id]:
+                del self._entries[cache_key]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+def make_etag(cache_key: tuple) -> str:
+    """Weak ETag derived from the cache key, so it can be checked before any ranking SQL runs."""
+    return f'W/"{hashlib.sha1(repr(cache_key).encode()).hexdigest()[:20]}"'
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidate_tags = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in candidate_tags or etag in candidate_tags or etag.removeprefix("W/") in candidate_tags
+
+@lru_cache(maxsize=1)
+def get_result_cache() -> ResultCache:
+    return ResultCache(ApiSettings().result_cache_max_entries)
+
+def tracker_top_cache_key(database_session: Session, tracker_id: int) -> tuple:
+    tracker: Tracker | None = database_session.get(Tracker, tracker_id)
+    if tracker is None or not tracker.is_active:
+        return ("tracker_top", tracker_id, None)
+
+    latest_snapshot_bucket = database_session.execute(
+        select(func.max(VideoLatestStats.captured_at))
+        .join(TrackerCandidate, TrackerCandidate.video_id == VideoLatestStats.video_id)
+        .where(TrackerCandidate.tracker_id == tracker_id)
+    ).scalar_one_or_none()
+    # Live rankings slide their window every hour; stored ones only change when the worker rewrites them.
+    result_version = tracker.leaderboard_computed_at or hour_bucket(utc_now())
+    return (
+        "tracker_top",
+        tracker_id,
+        tracker.ranking_metric.value,
+        tracker.ranking_window_hours,
+        tracker.top_n,
+        latest_snapshot_bucket,
+        result_version,
+    )
+
+def timeseries_cache_key(
+    database_session: Session, video_id: str, metric: str, days: int, resolution: str, max_points: int
+) -> tuple:
+    latest_snapshot_bucket = database_session.execute(
+        select(VideoLatestStats.captured_at).where(VideoLatestStats.video_id == video_id)
+    ).scalar_one_or_none()
+    return (
+        "timeseries",
+        video_id,
+        metric,
+        days,
+        resolution,
+        max_points,
+        latest_snapshot_bucket,
+        hour_bucket(utc_now()),
+    )
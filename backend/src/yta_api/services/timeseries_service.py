@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta, timezone
+from typing import Literal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from yta_api.services.downsampling import largest_triangle_three_buckets
+from yta_core.cold_storage import load_cold_samples
+from yta_core.db.models import VideoDailyStats, VideoSnapshot
+from yta_core.time_utils import hour_bucket, utc_now
+
+TIMESERIES_METRICS = ("view_count", "like_count", "comment_count")
+
+TimeseriesResolution = Literal["auto", "hourly", "daily"]
+
+# Hourly snapshots are read only while that is at most this many times `max_points` rows, even
+# when hourly is asked for; longer windows use the daily rollup. LTTB then trims to `max_points`.
+HOURLY_OVERSAMPLING_FACTOR = 4
+
+def timeseries_window_start(days: int) -> datetime:
+    """Bucket-aligned so every request within the hour sees the same window."""
+    return hour_bucket(utc_now()) - timedelta(days=days)
+
+def pick_resolution(resolution: TimeseriesResolution, days: int, max_points: int) -> Literal["hourly", "daily"]:
+    if resolution == "daily":
+        return "daily"
+    return "hourly" if days * 24 <= max_points * HOURLY_OVERSAMPLING_FACTOR else "daily"
+
+def load_hourly_points(
+    database_session: Session, video_id: str, metric: str, since_time: datetime
+) -> list[tuple[datetime, int | None]]:
+    """Hourly points from the cold tier and raw snapshots; raw wins where both have a timestamp."""
+    metric_column = getattr(VideoSnapshot, metric)
+    rows = database_session.execute(
+        select(VideoSnapshot.captured_at, metric_column)
+        .where(VideoSnapshot.video_id == video_id)
+        .where(VideoSnapshot.captured_at >= since_time)
+        .order_by(VideoSnapshot.captured_at.asc())
+    ).all()
+
+    cold_samples = load_cold_samples(database_session, [video_id], since_time).get(video_id)
+    if not cold_samples:
+        return [(row[0], row[1]) for row in rows]
+
+    value_by_timestamp = {sample.captured_at: getattr(sample, metric) for sample in cold_samples}
+    value_by_timestamp.update((row[0], row[1]) for row in rows)
+    return sorted(value_by_timestamp.items())
+
+def load_daily_points(
+    database_session: Session, video_id: str, metric: str, since_time: datetime
+) -> list[tuple[datetime, int | None]]:
+    """One point per day: the day's last value, stamped at the time it was captured."""
+    last_value_column = getattr(VideoDailyStats, f"{metric}_last")
+    rows = database_session.execute(
+        select(VideoDailyStats.last_captured_at, last_value_column)
+        .where(VideoDailyStats.video_id == video_id)
+        .where(VideoDailyStats.day >= since_time.astimezone(timezone.utc).date())
+        .where(VideoDailyStats.last_captured_at >= since_time)
+        .order_by(VideoDailyStats.day.asc())
+    ).all()
+    return [(row[0], row[1]) for row in rows]
+
+def load_timeseries_points(
+    database_session: Session,
+    video_id: str,
+    metric: str,
+    days: int,
+    resolution: TimeseriesResolution,
+    max_points: int,
+) -> list[tuple[datetime, int | None]]:
+    """Series for one video and metric, never longer than `max_points`."""
+    since_time = timeseries_window_start(days)
+    if pick_resolution(resolution, days, max_points) == "hourly":
+        points = load_hourly_points(database_session, video_id, metric, since_time)
+    else:
+        points = load_daily_points(database_session, video_id, metric, since_time)
+
+    if len(points) <= max_points:
+        return points
+    return largest_triangle_three_buckets(points, max_points)
+
+def load_bulk_timeseries(
+    database_session: Session, video_ids: list[str], metrics: list[str], days: int
+) -> tuple[list[datetime], dict[str, dict[str, list[int | None]]]]:
+    """Columnar series for many videos: a shared timestamp axis plus a value array per video and metric.
+
+    Reads all videos in one range scan over `ix_snapshots_video_time` (plus one block lookup for
+    compacted days); a video with no snapshot at a timestamp gets None there, so every array
+    lines up with the axis.
+    """
+    since_time = timeseries_window_start(days)
+    metric_columns = [getattr(VideoSnapshot, metric) for metric in metrics]
+    rows = database_session.execute(
+        select(VideoSnapshot.video_id, VideoSnapshot.captured_at, *metric_columns)
+        .where(VideoSnapshot.video_id.in_(video_ids))
+        .where(VideoSnapshot.captured_at >= since_time)
+        .order_by(VideoSnapshot.video_id, VideoSnapshot.captured_at)
+    ).all()
+
+    # Cold samples first so raw rows for the same timestamp overwrite them below.
+    cold_samples_by_video = load_cold_samples(database_session, video_ids, since_time)
+    rows = [
+        (video_id, sample.captured_at, *(getattr(sample, metric) for metric in metrics))
+        for video_id, cold_samples in cold_samples_by_video.items()
+        for sample in cold_samples
+    ] + [tuple(row) for row in rows]
+
+    timestamps = sorted({row[1] for row in rows})
+    axis_index_by_timestamp = {timestamp: axis_index for axis_index, timestamp in enumerate(timestamps)}
+
+    series: dict[str, dict[str, list[int | None]]] = {
+        video_id: {metric: [None] * len(timestamps) for metric in metrics} for video_id in video_ids
+    }
+    for row in rows:
+        axis_index = axis_index_by_timestamp[row[1]]
+        video_series = series[row[0]]
+        for metric_index, metric in enumerate(metrics):
+            video_series[metric][axis_index] = row[2 + metric_index]
+
+    return timestamps, series
+
+async def load_timeseries_points_async(
+    database_session: AsyncSession,
+    video_id: str,
+    metric: str,
+    days: int,
+    resolution: TimeseriesResolution,
+    max_points: int,
+) -> list[tuple[datetime, int | None]]:
+    return await database_session.run_sync(
+        load_timeseries_points, video_id, metric, days, resolution, max_points
+    )
+
+async def load_bulk_timeseries_async(
+    database_session: AsyncSession, video_ids: list[str], metrics: list[str], days: int
+) -> tuple[list[datetime], dict[str, dict[str, list[int | None]]]]:
+    return await database_session.run_sync(load_bulk_timeseries, video_ids, metrics, days)
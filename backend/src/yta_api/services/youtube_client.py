@@ -0,0 +1,9 @@
+from functools import lru_cache
+from yta_api.settings import ApiSettings
+from yta_core.youtube.async_client import AsyncYouTubeClient
+
+@lru_cache(maxsize=1)
+def get_async_youtube_client() -> AsyncYouTubeClient:
+    """Process-wide client so request handlers share one pooled session and concurrency limit."""
+    api_settings = ApiSettings()
+    return AsyncYouTubeClient(api_settings.youtube_api_key, max_concurrency=api_settings.youtube_http_pool_size)
@@ -6,3 +6,7 @@ class ApiSettings(CoreSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
     cors_allow_origins: list[str] = Field(default_factory=lambda: ["*"])
+    result_cache_max_entries: int = Field(default=1024, ge=1, alias="RESULT_CACHE_MAX_ENTRIES")
+    channel_meta_cache_max_entries: int = Field(default=10000, ge=1, alias="CHANNEL_META_CACHE_MAX_ENTRIES")
+    # How long a process serves a channel row before rereading it; the worker refreshes the table.
+    channel_meta_cache_ttl_seconds: int = Field(default=300, ge=1, alias="CHANNEL_META_CACHE_TTL_SECONDS")
@@ -0,0 +1,71 @@
+import asyncio
+from datetime import timedelta
+from typing import Any, cast
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from yta_api.services.channel_cache import ChannelMetadataCache
+
+class StubSession:
+    """Answers `run_sync(load_channels, ids)` with no stored channels once `release` is set."""
+
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+        self.reads: list[list[str]] = []
+
+    async def run_sync(self, function: Any, channel_ids: list[str]) -> dict:
+        self.reads.append(list(channel_ids))
+        await self.release.wait()
+        return {}
+
+def stub_session(session: StubSession) -> AsyncSession:
+    return cast(AsyncSession, session)
+
+def test_concurrent_misses_share_one_read() -> None:
+    async def scenario() -> None:
+        cache = ChannelMetadataCache(max_entries=10, ttl=timedelta(minutes=5))
+        session = StubSession()
+        first = asyncio.create_task(cache.get_many(stub_session(session), ["UC1", "UC2"]))
+        second = asyncio.create_task(cache.get_many(stub_session(session), ["UC2"]))
+        await asyncio.sleep(0)
+        session.release.set()
+        assert set(await first) == {"UC1", "UC2"}
+        assert set(await second) == {"UC2"}
+        assert session.reads == [["UC1", "UC2"]]
+        assert cache.stats()["coalesced"] == 1
+
+    asyncio.run(scenario())
+
+def test_cancelled_owner_does_not_fail_other_waiters() -> None:
+    async def scenario() -> None:
+        cache = ChannelMetadataCache(max_entries=10, ttl=timedelta(minutes=5))
+        owner_session, waiter_session = StubSession(), StubSession()
+        owner = asyncio.create_task(cache.get_many(stub_session(owner_session), ["UC1"]))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_many(stub_session(waiter_session), ["UC1"]))
+        await asyncio.sleep(0)
+
+        owner.cancel()
+        waiter_session.release.set()
+        assert (await waiter)["UC1"].channel_id == "UC1"
+        assert owner.cancelled()
+        assert waiter_session.reads == [["UC1"]]
+        assert cache.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+def test_cancelled_waiter_leaves_the_shared_read_running() -> None:
+    async def scenario() -> None:
+        cache = ChannelMetadataCache(max_entries=10, ttl=timedelta(minutes=5))
+        session = StubSession()
+        owner = asyncio.create_task(cache.get_many(stub_session(session), ["UC1"]))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_many(stub_session(session), ["UC1"]))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        await asyncio.sleep(0)
+        session.release.set()
+        assert (await owner)["UC1"].channel_id == "UC1"
+        assert waiter.cancelled()
+
+    asyncio.run(scenario())
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+
+from yta_api.services.downsampling import largest_triangle_three_buckets
+
+SERIES_START = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+def hourly_series(values: list[int | None]) -> list[tuple[datetime, int | None]]:
+    return [(SERIES_START + timedelta(hours=hour), value) for hour, value in enumerate(values)]
+
+def test_short_series_is_returned_unchanged() -> None:
+    points = hourly_series([1, 2, 3])
+    assert largest_triangle_three_buckets(points, 10) == points
+
+def test_points_without_values_are_dropped() -> None:
+    points = hourly_series([1, None, 3, None])
+    assert largest_triangle_three_buckets(points, 10) == [points[0], points[2]]
+
+def test_downsampled_series_keeps_endpoints_and_size() -> None:
+    points = hourly_series(list(range(1_000)))
+    sampled_points = largest_triangle_three_buckets(points, 50)
+
+    assert len(sampled_points) == 50
+    assert sampled_points[0] == points[0]
+    assert sampled_points[-1] == points[-1]
+
+def test_downsampled_points_are_a_time_ordered_subset() -> None:
+    points = hourly_series([(hour * 37) % 101 for hour in range(500)])
+    sampled_points = largest_triangle_three_buckets(points, 40)
+
+    assert set(sampled_points) <= set(points)
+    assert sampled_points == sorted(sampled_points)
+
+def test_isolated_spike_survives_downsampling() -> None:
+    values: list[int | None] = [100] * 1_000
+    values[613] = 50_000
+    points = hourly_series(values)
+
+    assert points[613] in largest_triangle_three_buckets(points, 20)
+
+def test_tiny_budgets_keep_the_endpoints() -> None:
+    points = hourly_series(list(range(10)))
+    assert largest_triangle_three_buckets(points, 2) == [points[0], points[-1]]
+    assert largest_triangle_three_buckets(points, 1) == [points[0]]
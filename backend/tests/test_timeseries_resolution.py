@@ -0,0 +1,16 @@
+from yta_api.services.timeseries_service import HOURLY_OVERSAMPLING_FACTOR, pick_resolution
+
+def test_auto_reads_hourly_rows_for_short_windows() -> None:
+    assert pick_resolution("auto", 7, 500) == "hourly"
+
+def test_auto_switches_to_daily_rows_for_long_windows() -> None:
+    assert pick_resolution("auto", 90, 500) == "daily"
+
+def test_explicit_hourly_falls_back_to_daily_past_the_oversampling_limit() -> None:
+    longest_hourly_days = 500 * HOURLY_OVERSAMPLING_FACTOR // 24
+    assert pick_resolution("hourly", longest_hourly_days, 500) == "hourly"
+    assert pick_resolution("hourly", longest_hourly_days + 1, 500) == "daily"
+    assert pick_resolution("hourly", 3650, 500) == "daily"
+
+def test_explicit_daily_is_kept_for_short_windows() -> None:
+    assert pick_resolution("daily", 1, 500) == "daily"
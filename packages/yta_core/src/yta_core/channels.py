@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+from typing import Iterable
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from yta_core.db.models import Channel, ChannelHandle
+
+CHANNEL_META_FIELDS = "items(id,snippet(title,customUrl,thumbnails(default(url))))"
+CHANNEL_META_BATCH_SIZE = 50
+# IDs the API did not return (deleted, terminated, not yet visible) are retried sooner.
+MISSING_CHANNEL_META_TTL = timedelta(minutes=30)
+# Handles rarely move between channels; a miss may be a typo or a handle claimed later.
+HANDLE_RESOLUTION_TTL = timedelta(days=30)
+UNRESOLVED_HANDLE_TTL = timedelta(hours=1)
+
+def normalize_handle(custom_url: str | None) -> str | None:
+    if not custom_url:
+        return None
+    stripped = custom_url.strip()
+    if not stripped:
+        return None
+    return stripped if stripped.startswith("@") else f"@{stripped}"
+
+def channel_rows_from_items(
+    items: list[dict], requested_channel_ids: list[str], fetched_at: datetime, refresh_interval: timedelta
+) -> list[dict]:
+    """`channels` rows for one `channels.list` response, including not-found rows for IDs it left out.
+
+    `expires_at` is when the row is due for its next refresh.
+    """
+    rows_by_channel: dict[str, dict] = {}
+    for item in items:
+        channel_id = item.get("id")
+        if not isinstance(channel_id, str):
+            continue
+
+        snippet = item.get("snippet") or {}
+        thumbnails = snippet.get("thumbnails") or {}
+        default_thumbnail = thumbnails.get("default") or {}
+        thumbnail_url = default_thumbnail.get("url")
+        rows_by_channel[channel_id] = {
+            "channel_id": channel_id,
+            "title": snippet.get("title"),
+            "handle": normalize_handle(snippet.get("customUrl")),
+            "thumbnail_url": thumbnail_url if isinstance(thumbnail_url, str) else None,
+            "is_found": True,
+            "fetched_at": fetched_at,
+            "expires_at": fetched_at + refresh_interval,
+        }
+
+    for channel_id in requested_channel_ids:
+        rows_by_channel.setdefault(
+            channel_id,
+            {
+                "channel_id": channel_id,
+                "title": None,
+                "handle": None,
+                "thumbnail_url": None,
+                "is_found": False,
+                "fetched_at": fetched_at,
+                "expires_at": fetched_at + min(refresh_interval, MISSING_CHANNEL_META_TTL),
+            },
+        )
+    return list(rows_by_channel.values())
+
+def load_channels(database_session: Session, channel_ids: Iterable[str]) -> dict[str, Channel]:
+    """Stored rows for `channel_ids`, stale or not; the worker keeps them refreshed."""
+    channel_id_list = list(channel_ids)
+    if not channel_id_list:
+        return {}
+    channels = database_session.execute(select(Channel).where(Channel.channel_id.in_(channel_id_list))).scalars()
+    return {channel.channel_id: channel for channel in channels}
+
+def upsert_channels(database_session: Session, channel_rows: list[dict]) -> None:
+    """Insert or overwrite `channels` rows and seed `channel_handles` from their handles (caller commits)."""
+    if not channel_rows:
+        return
+    channel_insert = insert(Channel).values(channel_rows)
+    database_session.execute(
+        channel_insert.on_conflict_do_update(
+            index_elements=[Channel.channel_id],
+            set_={
+                column_name: channel_insert.excluded[column_name]
+                for column_name in ("title", "handle", "thumbnail_url", "is_found", "fetched_at", "expires_at")
+            },
+        )
+    )
+    # customUrl is the channel's @handle, so metadata fetches double as free handle lookups.
+    store_handle_resolutions(
+        database_session,
+        {row["handle"]: row["channel_id"] for row in channel_rows if row["handle"]},
+        max(row["fetched_at"] for row in channel_rows),
+    )
+
+def handle_cache_key(handle: str) -> str:
+    """Handles are case-insensitive, so `@Foo` and `@foo` share one cache row."""
+    return handle.strip().lower()
+
+def load_handle_resolutions(
+    database_session: Session, handles: Iterable[str], now: datetime
+) -> dict[str, ChannelHandle]:
+    """Unexpired cached resolutions keyed by `handle_cache_key`; absent handles need an API lookup."""
+    handle_keys = list({handle_cache_key(handle) for handle in handles})
+    if not handle_keys:
+        return {}
+    channel_handles = database_session.execute(
+        select(ChannelHandle).where(ChannelHandle.handle.in_(handle_keys)).where(ChannelHandle.expires_at > now)
+    ).scalars()
+    return {channel_handle.handle: channel_handle for channel_handle in channel_handles}
+
+def store_handle_resolutions(
+    database_session: Session, channel_id_by_handle: dict[str, str | None], resolved_at: datetime
+) -> None:
+    """Record lookup results, negative ones (None) included (caller commits)."""
+    handle_rows = {
+        handle_cache_key(handle): {
+            "handle": handle_cache_key(handle),
+            "channel_id": channel_id,
+            "resolved_at": resolved_at,
+            "expires_at": resolved_at + (HANDLE_RESOLUTION_TTL if channel_id else UNRESOLVED_HANDLE_TTL),
+        }
+        for handle, channel_id in channel_id_by_handle.items()
+    }
+    if not handle_rows:
+        return
+    handle_insert = insert(ChannelHandle).values(list(handle_rows.values()))
+    database_session.execute(
+        handle_insert.on_conflict_do_update(
+            index_elements=[ChannelHandle.handle],
+            set_={
+                "channel_id": handle_insert.excluded.channel_id,
+                "resolved_at": handle_insert.excluded.resolved_at,
+                "expires_at": handle_insert.excluded.expires_at,
+            },
+        )
+    )
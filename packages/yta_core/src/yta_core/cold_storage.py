@@ -0,0 +1,228 @@
+import zlib
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, NamedTuple, cast
+from sqlalchemy import delete, func, select
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from yta_core.db.models import VideoSnapshot, VideoSnapshotBlock
+
+SNAPSHOT_BLOCK_FORMAT_VERSION = 1
+SNAPSHOT_METRICS = ("view_count", "like_count", "comment_count")
+
+class SnapshotSample(NamedTuple):
+    captured_at: datetime
+    view_count: int | None
+    like_count: int | None
+    comment_count: int | None
+
+def _sample_metric_values(sample: SnapshotSample) -> tuple[int | None, int | None, int | None]:
+    """The sample's metrics in `SNAPSHOT_METRICS` order."""
+    return (sample.view_count, sample.like_count, sample.comment_count)
+
+def day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+def cold_tier_boundary(current_time: datetime, compaction_after_days: int) -> datetime | None:
+    """Samples captured before this may have been compacted into blocks; None when compaction is off."""
+    if compaction_after_days <= 0:
+        return None
+    return day_start((current_time - timedelta(days=compaction_after_days)).astimezone(timezone.utc).date())
+
+def _write_varint(buffer: bytearray, value: int) -> None:
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+def _read_varint(payload: bytes, offset: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = payload[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+def _unzigzag(value: int) -> int:
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+def encode_snapshot_block(day: date, samples: list[SnapshotSample]) -> bytes:
+    """Pack one video-day of samples as zlib-compressed, delta-encoded varint columns.
+
+    Layout: version, sample count, capture offsets (seconds since midnight UTC, delta from the
+    previous sample), then one column per metric where 0 is NULL and n > 0 is zigzag(delta) + 1
+    relative to the previous non-null value.
+    """
+    ordered_samples = sorted(samples, key=lambda sample: sample.captured_at)
+    buffer = bytearray([SNAPSHOT_BLOCK_FORMAT_VERSION])
+    _write_varint(buffer, len(ordered_samples))
+
+    midnight = day_start(day)
+    previous_offset = 0
+    for sample in ordered_samples:
+        offset_seconds = int((sample.captured_at - midnight).total_seconds())
+        _write_varint(buffer, offset_seconds - previous_offset)
+        previous_offset = offset_seconds
+
+    for metric_index in range(len(SNAPSHOT_METRICS)):
+        previous_value = 0
+        for sample in ordered_samples:
+            value = _sample_metric_values(sample)[metric_index]
+            if value is None:
+                _write_varint(buffer, 0)
+                continue
+            _write_varint(buffer, _zigzag(value - previous_value) + 1)
+            previous_value = value
+
+    return zlib.compress(bytes(buffer), 9)
+
+def decode_snapshot_block(day: date, payload: bytes) -> list[SnapshotSample]:
+    raw_payload = zlib.decompress(payload)
+    if raw_payload[0] != SNAPSHOT_BLOCK_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot block format {raw_payload[0]}")
+
+    sample_count, offset = _read_varint(raw_payload, 1)
+    midnight = day_start(day)
+
+    captured_at_values: list[datetime] = []
+    offset_seconds = 0
+    for _ in range(sample_count):
+        offset_delta, offset = _read_varint(raw_payload, offset)
+        offset_seconds += offset_delta
+        captured_at_values.append(midnight + timedelta(seconds=offset_seconds))
+
+    metric_columns: list[list[int | None]] = []
+    for _ in SNAPSHOT_METRICS:
+        metric_values: list[int | None] = []
+        previous_value = 0
+        for _ in range(sample_count):
+            encoded_value, offset = _read_varint(raw_payload, offset)
+            if encoded_value == 0:
+                metric_values.append(None)
+                continue
+            previous_value += _unzigzag(encoded_value - 1)
+            metric_values.append(previous_value)
+        metric_columns.append(metric_values)
+
+    return [
+        SnapshotSample(captured_at, *(metric_values[sample_index] for metric_values in metric_columns))
+        for sample_index, captured_at in enumerate(captured_at_values)
+    ]
+
+def load_cold_samples(
+    database_session: Session, video_ids: Iterable[str], since_time: datetime, until_time: datetime | None = None
+) -> dict[str, list[SnapshotSample]]:
+    """Decoded cold-tier samples per video with `since_time <= captured_at (< until_time)`, time-ordered."""
+    video_id_list = list(video_ids)
+    if not video_id_list:
+        return {}
+
+    block_query = (
+        select(VideoSnapshotBlock.video_id, VideoSnapshotBlock.day, VideoSnapshotBlock.payload)
+        .where(VideoSnapshotBlock.video_id.in_(video_id_list))
+        .where(VideoSnapshotBlock.day >= since_time.astimezone(timezone.utc).date())
+        .order_by(VideoSnapshotBlock.video_id, VideoSnapshotBlock.day)
+    )
+    if until_time is not None:
+        block_query = block_query.where(VideoSnapshotBlock.day <= until_time.astimezone(timezone.utc).date())
+
+    samples_by_video: dict[str, list[SnapshotSample]] = {}
+    for video_id, day, payload in database_session.execute(block_query):
+        samples_by_video.setdefault(video_id, []).extend(
+            sample
+            for sample in decode_snapshot_block(day, payload)
+            if sample.captured_at >= since_time and (until_time is None or sample.captured_at < until_time)
+        )
+    return samples_by_video
+
+def delete_expired_snapshot_blocks(database_session: Session, retention_cutoff: datetime) -> int:
+    """Delete cold blocks for days before `retention_cutoff`; returns the number removed (caller commits).
+
+    Blocks have no partitions to detach, so retention always deletes them.
+    """
+    deleted_blocks = cast(
+        CursorResult,
+        database_session.execute(
+            delete(VideoSnapshotBlock)
+            .where(VideoSnapshotBlock.day < retention_cutoff.astimezone(timezone.utc).date())
+            .execution_options(synchronize_session=False)
+        ),
+    )
+    return deleted_blocks.rowcount
+
+def compact_oldest_cold_day(database_session: Session, cutoff_time: datetime, max_videos: int) -> int:
+    """Move raw snapshots of the oldest UTC day before `cutoff_time` into blocks, `max_videos` at a time.
+
+    Only whole days ending at or before the cutoff are compacted. Late rows for a day that already
+    has a block are merged into it. Returns the number of raw rows compacted (caller commits).
+    """
+    last_compactable_day = cutoff_time.astimezone(timezone.utc).date() - timedelta(days=1)
+    oldest_captured_at = database_session.execute(
+        select(func.min(VideoSnapshot.captured_at)).where(
+            VideoSnapshot.captured_at < day_start(last_compactable_day + timedelta(days=1))
+        )
+    ).scalar_one_or_none()
+    if oldest_captured_at is None:
+        return 0
+
+    compact_day = oldest_captured_at.astimezone(timezone.utc).date()
+    day_window = (
+        VideoSnapshot.captured_at >= day_start(compact_day),
+        VideoSnapshot.captured_at < day_start(compact_day + timedelta(days=1)),
+    )
+    video_ids = database_session.execute(
+        select(VideoSnapshot.video_id).where(*day_window).distinct().order_by(VideoSnapshot.video_id).limit(max_videos)
+    ).scalars().all()
+
+    samples_by_video: dict[str, dict[datetime, SnapshotSample]] = {video_id: {} for video_id in video_ids}
+    for video_id, day, payload in database_session.execute(
+        select(VideoSnapshotBlock.video_id, VideoSnapshotBlock.day, VideoSnapshotBlock.payload)
+        .where(VideoSnapshotBlock.video_id.in_(video_ids))
+        .where(VideoSnapshotBlock.day == compact_day)
+    ):
+        samples_by_video[video_id].update((sample.captured_at, sample) for sample in decode_snapshot_block(day, payload))
+
+    raw_rows = database_session.execute(
+        select(
+            VideoSnapshot.video_id,
+            VideoSnapshot.captured_at,
+            VideoSnapshot.view_count,
+            VideoSnapshot.like_count,
+            VideoSnapshot.comment_count,
+        )
+        .where(VideoSnapshot.video_id.in_(video_ids))
+        .where(*day_window)
+    ).all()
+    for video_id, captured_at, view_count, like_count, comment_count in raw_rows:
+        samples_by_video[video_id][captured_at] = SnapshotSample(captured_at, view_count, like_count, comment_count)
+
+    block_insert = insert(VideoSnapshotBlock).values(
+        [
+            {
+                "video_id": video_id,
+                "day": compact_day,
+                "sample_count": len(samples_by_timestamp),
+                "payload": encode_snapshot_block(compact_day, list(samples_by_timestamp.values())),
+            }
+            for video_id, samples_by_timestamp in samples_by_video.items()
+        ]
+    )
+    database_session.execute(
+        block_insert.on_conflict_do_update(
+            index_elements=[VideoSnapshotBlock.video_id, VideoSnapshotBlock.day],
+            set_={"sample_count": block_insert.excluded.sample_count, "payload": block_insert.excluded.payload},
+        )
+    )
+    database_session.execute(
+        delete(VideoSnapshot)
+        .where(VideoSnapshot.video_id.in_(video_ids))
+        .where(*day_window)
+        .execution_options(synchronize_session=False)
+    )
+    return len(raw_rows)
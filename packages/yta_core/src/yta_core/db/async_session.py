@@ -0,0 +1,20 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from yta_core.settings import CoreSettings
+
+def async_database_url(database_url: str) -> str:
+    """The same database through the asyncpg driver, whichever sync driver DATABASE_URL names."""
+    return make_url(database_url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+core_settings = CoreSettings()
+
+# A fixed pool: overflow connections would be opened and closed per burst, and each asyncpg
+# connect pays a backend fork plus type introspection. Excess requests wait for a connection.
+async_engine = create_async_engine(
+    async_database_url(str(core_settings.database_url)),
+    pool_pre_ping=True,
+    pool_size=core_settings.async_database_pool_size,
+    max_overflow=0,
+)
+# Objects stay readable after commit; lazy refreshes would need an await the caller can't give.
+AsyncSessionFactory = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
@@ -1,12 +1,17 @@
 import enum
-from datetime import datetime
+from datetime import date, datetime
 from sqlalchemy import (
+    ARRAY,
     Boolean,
+    Computed,
+    Date,
     DateTime,
     Enum,
+    Float,
     ForeignKey,
     Index,
     Integer,
+    LargeBinary,
     String,
     UniqueConstraint,
     func,
@@ -60,6 +65,7 @@ class Tracker(Base):
 
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    leaderboard_computed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     owner: Mapped["User"] = relationship(back_populates="trackers")
     candidates: Mapped[list["TrackerCandidate"]] = relationship(back_populates="tracker", cascade="all, delete-orphan")
@@ -95,11 +101,13 @@ class TrackerCandidate(Base):
     )
 
 class VideoSnapshot(Base):
+    """Range-partitioned by month on `captured_at`; see `yta_core.db.partitions`."""
+
     __tablename__ = "video_snapshots"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     video_id: Mapped[str] = mapped_column(ForeignKey("videos.video_id"), nullable=False)
-    captured_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    captured_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, nullable=False)
 
     view_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
     like_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -109,4 +117,144 @@ class VideoSnapshot(Base):
         UniqueConstraint("video_id", "captured_at", name="uq_video_captured"),
         Index("ix_snapshots_video_time", "video_id", "captured_at"),
         Index("ix_snapshots_time", "captured_at"),
+        {"postgresql_partition_by": "RANGE (captured_at)"},
     )
+
+class VideoSnapshotBlock(Base):
+    """Cold tier: one video-day of snapshots, delta-encoded and compressed (see `yta_core.cold_storage`)."""
+
+    __tablename__ = "video_snapshot_blocks"
+
+    video_id: Mapped[str] = mapped_column(ForeignKey("videos.video_id"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    sample_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+class VideoLatestStats(Base):
+    """Most recent snapshot per video, maintained by the worker alongside `video_snapshots`."""
+
+    __tablename__ = "video_latest_stats"
+
+    video_id: Mapped[str] = mapped_column(ForeignKey("videos.video_id"), primary_key=True)
+    captured_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    view_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    like_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    comment_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+class VideoDailyStats(Base):
+    """Per-video UTC-day rollup of `video_snapshots`, merged by the worker as snapshots land."""
+
+    __tablename__ = "video_daily_stats"
+
+    video_id: Mapped[str] = mapped_column(ForeignKey("videos.video_id"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    first_captured_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_captured_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    view_count_first: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    view_count_last: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    view_count_max: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    view_count_delta: Mapped[int | None] = mapped_column(Integer, Computed("view_count_last - view_count_first"))
+
+    like_count_first: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    like_count_last: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    like_count_max: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    like_count_delta: Mapped[int | None] = mapped_column(Integer, Computed("like_count_last - like_count_first"))
+
+    comment_count_first: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    comment_count_last: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    comment_count_max: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    comment_count_delta: Mapped[int | None] = mapped_column(
+        Integer, Computed("comment_count_last - comment_count_first")
+    )
+
+class TrackerLeaderboardEntry(Base):
+    """Materialized top-N row for a tracker, rewritten by the worker after each snapshot tick."""
+
+    __tablename__ = "tracker_leaderboard_entries"
+
+    tracker_id: Mapped[int] = mapped_column(ForeignKey("trackers.id", ondelete="CASCADE"), primary_key=True)
+    rank: Mapped[int] = mapped_column(Integer, primary_key=True)
+    video_id: Mapped[str] = mapped_column(ForeignKey("videos.video_id"), nullable=False)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+
+    view_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    like_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    comment_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+class Channel(Base):
+    """Channel metadata refreshed by the worker and served by the API; `expires_at` marks the next refresh.
+
+    `is_found` is false for IDs the YouTube API did not return, cached for a shorter time.
+    """
+
+    __tablename__ = "channels"
+
+    channel_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    title: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    handle: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    thumbnail_url: Mapped[str | None] = mapped_column(String(1000), nullable=True)
+    is_found: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    fetched_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (Index("ix_channels_expires", "expires_at"),)
+
+class ChannelHandle(Base):
+    """Cached @handle -> UC... resolution; a NULL `channel_id` records a handle that did not resolve."""
+
+    __tablename__ = "channel_handles"
+
+    handle: Mapped[str] = mapped_column(String(255), primary_key=True)
+    channel_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    resolved_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+class SnapshotProgress(Base):
+    """Per-tracker checkpoint of the snapshot tick for `captured_at_bucket`.
+
+    Candidates are snapshotted in `video_id` order and committed in chunks; every candidate up to
+    and including `last_video_id` is done for that bucket, so a restarted tick resumes after it.
+    """
+
+    __tablename__ = "snapshot_progress"
+
+    tracker_id: Mapped[int] = mapped_column(ForeignKey("trackers.id", ondelete="CASCADE"), primary_key=True)
+    captured_at_bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_video_id: Mapped[str] = mapped_column(String(32), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+class ApiQuotaUsage(Base):
+    __tablename__ = "api_quota_usage"
+
+    usage_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    endpoint: Mapped[str] = mapped_column(String(64), primary_key=True)
+    units: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    calls: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+class WorkLease(Base):
+    """Time-limited claim by one worker process on a unit of tracker work ("discovery" or "snapshot")."""
+
+    __tablename__ = "work_leases"
+
+    job_kind: Mapped[str] = mapped_column(String(32), primary_key=True)
+    tracker_id: Mapped[int] = mapped_column(ForeignKey("trackers.id", ondelete="CASCADE"), primary_key=True)
+    owner: Mapped[str] = mapped_column(String(128), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (Index("ix_work_leases_expires", "expires_at"),)
+
+class DiscoverySource(Base):
+    """Latest discovery result per source, shared by every tracker that points at it.
+
+    `source_key` is "channel:<UC id>" or "search:<normalized query>".
+    """
+
+    __tablename__ = "discovery_sources"
+
+    source_key: Mapped[str] = mapped_column(String(300), primary_key=True)
+    video_ids: Mapped[list[str]] = mapped_column(ARRAY(String(32)), nullable=False)
+    requested_limit: Mapped[int] = mapped_column(Integer, nullable=False)
+    uploads_playlist_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    fetched_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
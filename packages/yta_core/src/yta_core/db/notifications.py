@@ -0,0 +1,21 @@
+from sqlalchemy import Select, func, select
+
+# Workers LISTEN here to reschedule without polling; the payload is comma-separated tracker IDs.
+TRACKER_CHANGES_CHANNEL = "yta_tracker_changes"
+# Postgres caps payloads at 8000 bytes; larger batches send "" and listeners reload every tracker.
+MAX_NOTIFY_PAYLOAD_LENGTH = 7000
+
+def tracker_changes_notification(tracker_ids: list[int]) -> Select:
+    """`pg_notify` statement for changed trackers; delivered only if the surrounding transaction commits."""
+    payload = ",".join(str(tracker_id) for tracker_id in tracker_ids)
+    if len(payload) > MAX_NOTIFY_PAYLOAD_LENGTH:
+        payload = ""
+    return select(func.pg_notify(TRACKER_CHANGES_CHANNEL, payload))
+
+def parse_tracker_changes_payload(payload: str) -> list[int] | None:
+    """Tracker IDs from a notification payload, or None when the listener should reload everything."""
+    try:
+        tracker_ids = [int(raw_id) for raw_id in payload.split(",") if raw_id.strip()]
+    except ValueError:
+        return None
+    return tracker_ids or None
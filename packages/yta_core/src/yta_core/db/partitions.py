@@ -0,0 +1,95 @@
+from datetime import datetime, timezone
+from typing import Literal
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+SNAPSHOT_PARENT_TABLE = "video_snapshots"
+SNAPSHOT_PARTITION_PREFIX = "video_snapshots_p"
+
+# Serializes partition DDL between workers; CREATE ... IF NOT EXISTS still races on the catalog.
+SNAPSHOT_PARTITION_LOCK_KEY = 7_151_015
+
+RetentionAction = Literal["drop", "detach"]
+
+def month_start(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def add_months(first_of_month: datetime, months: int) -> datetime:
+    month_index = first_of_month.year * 12 + (first_of_month.month - 1) + months
+    return first_of_month.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+def snapshot_partition_name(first_of_month: datetime) -> str:
+    return f"{SNAPSHOT_PARTITION_PREFIX}{first_of_month:%Y%m}"
+
+def list_snapshot_partitions(database_session: Session) -> list[str]:
+    return list(
+        database_session.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :parent_table ORDER BY child.relname"
+            ),
+            {"parent_table": SNAPSHOT_PARENT_TABLE},
+        ).scalars()
+    )
+
+def ensure_snapshot_partitions(database_session: Session, current_time: datetime, months_ahead: int) -> list[str]:
+    """Create monthly partitions from the current month through `months_ahead` months out.
+
+    Returns the names of the partitions that were created (caller commits).
+    """
+    database_session.execute(select(func.pg_advisory_xact_lock(SNAPSHOT_PARTITION_LOCK_KEY)))
+    existing_partitions = set(list_snapshot_partitions(database_session))
+
+    created_partitions: list[str] = []
+    current_month = month_start(current_time)
+    for month_offset in range(months_ahead + 1):
+        partition_start = add_months(current_month, month_offset)
+        partition_name = snapshot_partition_name(partition_start)
+        if partition_name in existing_partitions:
+            continue
+        database_session.execute(
+            text(
+                f"CREATE TABLE {partition_name} PARTITION OF {SNAPSHOT_PARENT_TABLE} "
+                f"FOR VALUES FROM ('{partition_start.isoformat()}') "
+                f"TO ('{add_months(partition_start, 1).isoformat()}')"
+            )
+        )
+        created_partitions.append(partition_name)
+    return created_partitions
+
+def snapshot_retention_cutoff(current_time: datetime, retention_months: int) -> datetime | None:
+    """Start of the oldest month kept by retention, or None when `retention_months` keeps everything."""
+    if retention_months <= 0:
+        return None
+    return add_months(month_start(current_time), -retention_months)
+
+def apply_snapshot_retention(
+    database_session: Session, current_time: datetime, retention_months: int, retention_action: RetentionAction
+) -> list[str]:
+    """Drop or detach partitions whose whole month is older than `retention_months` full months.
+
+    Detached partitions stay behind as standalone tables for archiving. `retention_months`
+    of 0 keeps everything. Returns the affected partition names (caller commits).
+    """
+    retention_cutoff = snapshot_retention_cutoff(current_time, retention_months)
+    if retention_cutoff is None:
+        return []
+
+    database_session.execute(select(func.pg_advisory_xact_lock(SNAPSHOT_PARTITION_LOCK_KEY)))
+    oldest_kept_partition = snapshot_partition_name(retention_cutoff)
+
+    expired_partitions = [
+        partition_name
+        for partition_name in list_snapshot_partitions(database_session)
+        if partition_name.startswith(SNAPSHOT_PARTITION_PREFIX) and partition_name < oldest_kept_partition
+    ]
+    for partition_name in expired_partitions:
+        if retention_action == "drop":
+            database_session.execute(text(f"DROP TABLE {partition_name}"))
+        else:
+            database_session.execute(
+                text(f"ALTER TABLE {SNAPSHOT_PARENT_TABLE} DETACH PARTITION {partition_name}")
+            )
+    return expired_partitions
@@ -0,0 +1,370 @@
+from collections import defaultdict
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import (
+    Date,
+    Float,
+    Integer,
+    String,
+    and_,
+    case,
+    column,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    select,
+    true,
+)
+from sqlalchemy.engine import Row
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+from yta_core.cold_storage import SnapshotSample, cold_tier_boundary, decode_snapshot_block
+from yta_core.db.models import (
+    RankingMetric,
+    Tracker,
+    TrackerCandidate,
+    TrackerLeaderboardEntry,
+    Video,
+    VideoLatestStats,
+    VideoSnapshot,
+    VideoSnapshotBlock,
+)
+from yta_core.db.session import core_settings
+from yta_core.time_utils import hour_bucket, utc_now
+
+DEFAULT_RANKING_WINDOW_HOURS = 24
+ONE_HOUR = literal_column("interval '1 hour'")
+ONE_MINUTE = literal_column("interval '1 minute'")
+# Window-start probes look back this many effective snapshot intervals before falling back to an
+# unbounded lookup, so one missed tick still stays within the recent partitions.
+WINDOW_LOOKBACK_INTERVALS = 2
+
+LATEST_VALUE_COLUMN_BY_METRIC = {
+    RankingMetric.views: "view_count",
+    RankingMetric.likes: "like_count",
+    RankingMetric.comments: "comment_count",
+    RankingMetric.views_delta: "view_count",
+    RankingMetric.likes_delta: "like_count",
+    RankingMetric.comments_delta: "comment_count",
+    RankingMetric.views_velocity: "view_count",
+}
+WINDOWED_METRICS = {
+    RankingMetric.views_delta,
+    RankingMetric.likes_delta,
+    RankingMetric.comments_delta,
+    RankingMetric.views_velocity,
+}
+
+def _window_lookback_minutes(tracker: Tracker) -> int:
+    """How far before a window start the bounded probe searches, from the worker's effective cadence."""
+    effective_interval_minutes = max(tracker.snapshot_interval_hours * 60, core_settings.snapshot_interval_minutes, 1)
+    return effective_interval_minutes * WINDOW_LOOKBACK_INTERVALS
+
+def _cold_window_start_values(
+    database_session: Session, ranking_metric: RankingMetric, trackers: list[Tracker], current_bucket: datetime
+) -> list[tuple[int, str, int | None]]:
+    """(tracker_id, video_id, value) of the latest compacted sample at or before each window start.
+
+    Only trackers whose lookback reaches the compacted tier are looked up. Candidates are joined
+    in SQL, with one index probe per candidate for its two newest blocks on or before the window
+    start's day; the older one covers a start that precedes that day's first sample.
+    """
+    compaction_boundary = cold_tier_boundary(utc_now(), core_settings.snapshot_compaction_after_days)
+    if compaction_boundary is None:
+        return []
+
+    window_start_by_tracker: dict[int, datetime] = {}
+    for tracker in trackers:
+        window_start = current_bucket - timedelta(hours=tracker.ranking_window_hours or DEFAULT_RANKING_WINDOW_HOURS)
+        if window_start - timedelta(minutes=_window_lookback_minutes(tracker)) < compaction_boundary:
+            window_start_by_tracker[tracker.id] = window_start
+    if not window_start_by_tracker:
+        return []
+
+    cold_windows = (
+        func.unnest(
+            literal(list(window_start_by_tracker), ARRAY(Integer)),
+            literal(
+                [window_start.astimezone(timezone.utc).date() for window_start in window_start_by_tracker.values()],
+                ARRAY(Date),
+            ),
+        )
+        .table_valued(column("tracker_id", Integer), column("window_start_day", Date))
+        .render_derived(name="cold_windows")
+    )
+    recent_blocks = (
+        select(VideoSnapshotBlock.day, VideoSnapshotBlock.payload)
+        .where(VideoSnapshotBlock.video_id == TrackerCandidate.video_id)
+        .where(VideoSnapshotBlock.day <= cold_windows.c.window_start_day)
+        .order_by(VideoSnapshotBlock.day.desc())
+        .limit(2)
+        .lateral()
+    )
+    block_rows = database_session.execute(
+        select(cold_windows.c.tracker_id, TrackerCandidate.video_id, recent_blocks.c.day, recent_blocks.c.payload)
+        .select_from(cold_windows)
+        .join(TrackerCandidate, TrackerCandidate.tracker_id == cold_windows.c.tracker_id)
+        .join(recent_blocks, true())
+    ).tuples()
+
+    value_column_name = LATEST_VALUE_COLUMN_BY_METRIC[ranking_metric]
+    start_sample_by_candidate: dict[tuple[int, str], SnapshotSample] = {}
+    for tracker_id, video_id, day, payload in block_rows:
+        window_start = window_start_by_tracker[tracker_id]
+        for sample in decode_snapshot_block(day, payload):
+            if sample.captured_at > window_start:
+                continue
+            start_sample = start_sample_by_candidate.get((tracker_id, video_id))
+            if start_sample is None or sample.captured_at > start_sample.captured_at:
+                start_sample_by_candidate[(tracker_id, video_id)] = sample
+
+    return [
+        (tracker_id, video_id, getattr(start_sample, value_column_name))
+        for (tracker_id, video_id), start_sample in start_sample_by_candidate.items()
+    ]
+
+def _rank_metric_group(
+    database_session: Session, ranking_metric: RankingMetric, trackers: list[Tracker]
+) -> Sequence[Row]:
+    """One windowed query ranking every tracker of a metric group, `rank <= top_n` rows per tracker.
+
+    Latest stats come from `video_latest_stats`; windowed metrics look up each candidate's
+    snapshot at the tracker's own window start through an index-backed LATERAL probe instead of
+    aggregating the whole snapshot table, bounded below so only recent partitions are scanned.
+    """
+    current_bucket = hour_bucket(utc_now())
+    # Per-tracker settings come from the passed objects as three array binds, so unflushed edits
+    # (a PATCH of top_n or the window) rank with their new values and the statement size stays fixed.
+    tracker_windows = (
+        func.unnest(
+            literal([tracker.id for tracker in trackers], ARRAY(Integer)),
+            literal([tracker.top_n for tracker in trackers], ARRAY(Integer)),
+            literal(
+                [tracker.ranking_window_hours or DEFAULT_RANKING_WINDOW_HOURS for tracker in trackers], ARRAY(Integer)
+            ),
+            literal([_window_lookback_minutes(tracker) for tracker in trackers], ARRAY(Integer)),
+        )
+        .table_valued(
+            column("tracker_id", Integer),
+            column("top_n", Integer),
+            column("window_hours", Integer),
+            column("lookback_minutes", Integer),
+        )
+        .render_derived(name="tracker_windows")
+    )
+    window_start = literal(current_bucket) - tracker_windows.c.window_hours * ONE_HOUR
+    group_candidates = (
+        select(
+            TrackerCandidate.tracker_id.label("tracker_id"),
+            TrackerCandidate.video_id.label("video_id"),
+            tracker_windows.c.top_n.label("top_n"),
+            tracker_windows.c.window_hours.label("window_hours"),
+            window_start.label("window_start"),
+            (window_start - tracker_windows.c.lookback_minutes * ONE_MINUTE).label("lookback_start"),
+        )
+        .join(tracker_windows, tracker_windows.c.tracker_id == TrackerCandidate.tracker_id)
+        .subquery()
+    )
+
+    value_column_name = LATEST_VALUE_COLUMN_BY_METRIC[ranking_metric]
+    latest_value = func.coalesce(getattr(VideoLatestStats, value_column_name), 0)
+    ranked_query = (
+        select(
+            group_candidates.c.tracker_id,
+            group_candidates.c.top_n,
+            Video.video_id,
+            Video.title,
+            Video.channel_id,
+            Video.published_at,
+            VideoLatestStats.view_count,
+            VideoLatestStats.like_count,
+            VideoLatestStats.comment_count,
+        )
+        .select_from(group_candidates)
+        .join(Video, Video.video_id == group_candidates.c.video_id)
+        .join(VideoLatestStats, VideoLatestStats.video_id == group_candidates.c.video_id)
+    )
+
+    if ranking_metric in WINDOWED_METRICS:
+        window_start_snapshot = (
+            select(getattr(VideoSnapshot, value_column_name).label("start_value"))
+            .where(VideoSnapshot.video_id == group_candidates.c.video_id)
+            .where(VideoSnapshot.captured_at <= group_candidates.c.window_start)
+            .where(VideoSnapshot.captured_at >= group_candidates.c.lookback_start)
+            .order_by(VideoSnapshot.captured_at.desc())
+            .limit(1)
+            .lateral()
+        )
+        ranked_query = ranked_query.outerjoin(window_start_snapshot, true())
+        # Gaps longer than the lookback (downtime, quota exhaustion) fall back to the latest sample
+        # of any age. COALESCE only evaluates this subquery for rows the bounded probe missed, and
+        # videos published after the window start cannot have an earlier sample.
+        unbounded_start_value = (
+            select(getattr(VideoSnapshot, value_column_name))
+            .where(VideoSnapshot.video_id == group_candidates.c.video_id)
+            .where(VideoSnapshot.captured_at <= group_candidates.c.window_start)
+            .order_by(VideoSnapshot.captured_at.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        start_value = func.coalesce(
+            window_start_snapshot.c.start_value,
+            case(
+                (
+                    or_(Video.published_at.is_(None), Video.published_at <= group_candidates.c.window_start),
+                    unbounded_start_value,
+                ),
+                else_=None,
+            ),
+        )
+
+        # Samples older than the compaction threshold live in cold blocks, decoded here; raw
+        # samples are always newer, so these only fill in what both raw probes missed.
+        cold_start_values = _cold_window_start_values(database_session, ranking_metric, trackers, current_bucket)
+        if cold_start_values:
+            cold_tracker_ids, cold_video_ids, cold_values = zip(*cold_start_values)
+            cold_window_start = (
+                func.unnest(
+                    literal(list(cold_tracker_ids), ARRAY(Integer)),
+                    literal(list(cold_video_ids), ARRAY(String)),
+                    literal(list(cold_values), ARRAY(Integer)),
+                )
+                .table_valued(
+                    column("tracker_id", Integer), column("video_id", String), column("start_value", Integer)
+                )
+                .render_derived(name="cold_window_start")
+            )
+            ranked_query = ranked_query.outerjoin(
+                cold_window_start,
+                and_(
+                    cold_window_start.c.tracker_id == group_candidates.c.tracker_id,
+                    cold_window_start.c.video_id == group_candidates.c.video_id,
+                ),
+            )
+            start_value = func.coalesce(start_value, cold_window_start.c.start_value)
+
+        score = (latest_value - func.coalesce(start_value, 0)).cast(Float)
+        if ranking_metric == RankingMetric.views_velocity:
+            score = score / group_candidates.c.window_hours
+    else:
+        score = latest_value.cast(Float)
+
+    ranked = ranked_query.add_columns(
+        score.label("score"),
+        func.row_number()
+        .over(partition_by=group_candidates.c.tracker_id, order_by=score.desc())
+        .label("rank"),
+    ).subquery()
+
+    return database_session.execute(
+        select(
+            ranked.c.tracker_id,
+            ranked.c.video_id,
+            ranked.c.title,
+            ranked.c.channel_id,
+            ranked.c.published_at,
+            ranked.c.score,
+            ranked.c.view_count,
+            ranked.c.like_count,
+            ranked.c.comment_count,
+        )
+        .where(ranked.c.rank <= ranked.c.top_n)
+        .order_by(ranked.c.tracker_id, ranked.c.rank)
+    ).all()
+
+def compute_top_videos_for_trackers(database_session: Session, trackers: list[Tracker]) -> dict[int, list[dict]]:
+    """Live top-N rows for many trackers, one ranking query per distinct metric among them."""
+    top_rows_by_tracker: dict[int, list[dict]] = {tracker.id: [] for tracker in trackers}
+
+    trackers_by_metric: dict[RankingMetric, list[Tracker]] = defaultdict(list)
+    for tracker in trackers:
+        if tracker.is_active:
+            trackers_by_metric[tracker.ranking_metric].append(tracker)
+
+    for ranking_metric, metric_trackers in trackers_by_metric.items():
+        for row in _rank_metric_group(database_session, ranking_metric, metric_trackers):
+            row_values = dict(row._mapping)
+            top_rows_by_tracker[row_values.pop("tracker_id")].append(row_values)
+
+    return top_rows_by_tracker
+
+def compute_top_videos(database_session: Session, tracker_id: int) -> list[dict]:
+    tracker: Tracker | None = database_session.get(Tracker, tracker_id)
+    if tracker is None or not tracker.is_active:
+        return []
+    return compute_top_videos_for_trackers(database_session, [tracker])[tracker.id]
+
+def refresh_tracker_leaderboards(database_session: Session, trackers: list[Tracker]) -> None:
+    """Recompute the trackers' top N and replace their stored leaderboards (caller commits)."""
+    if not trackers:
+        return
+
+    computed_rows_by_tracker = compute_top_videos_for_trackers(database_session, trackers)
+
+    database_session.execute(
+        delete(TrackerLeaderboardEntry).where(
+            TrackerLeaderboardEntry.tracker_id.in_([tracker.id for tracker in trackers])
+        )
+    )
+    leaderboard_rows = [
+        {
+            "tracker_id": tracker_id,
+            "rank": rank,
+            "video_id": row["video_id"],
+            "score": float(row.get("score") or 0.0),
+            "view_count": row.get("view_count"),
+            "like_count": row.get("like_count"),
+            "comment_count": row.get("comment_count"),
+        }
+        for tracker_id, computed_rows in computed_rows_by_tracker.items()
+        for rank, row in enumerate(computed_rows, start=1)
+    ]
+    if leaderboard_rows:
+        database_session.execute(insert(TrackerLeaderboardEntry), leaderboard_rows)
+
+    computed_at = utc_now()
+    for tracker in trackers:
+        tracker.leaderboard_computed_at = computed_at
+        database_session.add(tracker)
+
+def refresh_tracker_leaderboard(database_session: Session, tracker: Tracker) -> None:
+    refresh_tracker_leaderboards(database_session, [tracker])
+
+def load_tracker_leaderboards(database_session: Session, trackers: list[Tracker]) -> dict[int, list[dict]]:
+    """Stored leaderboard rows in the `compute_top_videos` shape for the materialized trackers.
+
+    Trackers that were never materialized are left out of the result.
+    """
+    stored_rows_by_tracker: dict[int, list[dict]] = {
+        tracker.id: [] for tracker in trackers if tracker.leaderboard_computed_at is not None
+    }
+    if not stored_rows_by_tracker:
+        return {}
+
+    rows = database_session.execute(
+        select(
+            TrackerLeaderboardEntry.tracker_id,
+            TrackerLeaderboardEntry.video_id,
+            Video.title,
+            Video.channel_id,
+            Video.published_at,
+            TrackerLeaderboardEntry.score,
+            TrackerLeaderboardEntry.view_count,
+            TrackerLeaderboardEntry.like_count,
+            TrackerLeaderboardEntry.comment_count,
+        )
+        .join(Video, Video.video_id == TrackerLeaderboardEntry.video_id)
+        .where(TrackerLeaderboardEntry.tracker_id.in_(list(stored_rows_by_tracker)))
+        .order_by(TrackerLeaderboardEntry.tracker_id, TrackerLeaderboardEntry.rank)
+    ).all()
+    for row in rows:
+        row_values = dict(row._mapping)
+        stored_rows_by_tracker[row_values.pop("tracker_id")].append(row_values)
+    return stored_rows_by_tracker
+
+def load_tracker_leaderboard(database_session: Session, tracker: Tracker) -> list[dict] | None:
+    """Stored leaderboard rows for one tracker, or None if never materialized."""
+    return load_tracker_leaderboards(database_session, [tracker]).get(tracker.id)
@@ -5,4 +5,10 @@ class CoreSettings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
     database_url: PostgresDsn = Field(alias="DATABASE_URL")
+    async_database_pool_size: int = Field(default=15, ge=1, alias="ASYNC_DATABASE_POOL_SIZE")
     youtube_api_key: str = Field(default="", alias="YOUTUBE_API_KEY")
+    youtube_http_pool_size: int = Field(default=10, ge=1, alias="YOUTUBE_HTTP_POOL_SIZE")
+    # Floor on any tracker's snapshot cadence; the API's ranking needs it to bound window lookups.
+    snapshot_interval_minutes: int = Field(default=60, alias="SNAPSHOT_INTERVAL_MINUTES")
+    # Raw snapshots older than this many days are compacted into cold-tier blocks; 0 disables.
+    snapshot_compaction_after_days: int = Field(default=14, ge=0, alias="SNAPSHOT_COMPACTION_AFTER_DAYS")
@@ -0,0 +1,146 @@
+import asyncio
+from typing import Iterable
+
+import httpx
+
+from yta_core.youtube.client import (
+    DEFAULT_VIDEO_PARTS,
+    HTTP_HEADERS,
+    YOUTUBE_API_BASE_URL,
+    first_channel_id,
+    handle_lookup_params,
+    parse_channel_identifier,
+    playlist_items_params,
+    playlist_page_video_ids,
+    search_page_video_ids,
+    search_params,
+    uploads_playlist_id_from_payload,
+    uploads_playlist_params,
+)
+from yta_core.youtube.quota import QuotaTracker
+
+
+class AsyncYouTubeClient:
+    """Non-blocking counterpart of `YouTubeClient` with the same methods.
+
+    At most `max_concurrency` requests are in flight per client; further calls wait on a
+    semaphore, so callers can `asyncio.gather` many lookups without flooding the API.
+    The client must be used (and closed) on the event loop it was first awaited on.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        max_concurrency: int = 10,
+        base_url: str = YOUTUBE_API_BASE_URL,
+        quota_tracker: QuotaTracker | None = None,
+    ) -> None:
+        if not api_key:
+            raise ValueError("YOUTUBE_API_KEY must be set.")
+        self._api_key = api_key
+        self._quota_tracker = quota_tracker
+        self._request_slots = asyncio.Semaphore(max_concurrency)
+        self._http_client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/") + "/",
+            headers=HTTP_HEADERS,
+            timeout=30,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+
+    async def aclose(self) -> None:
+        await self._http_client.aclose()
+
+    async def __aenter__(self) -> "AsyncYouTubeClient":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def _get(self, path: str, params: dict[str, str | int | None]) -> dict:
+        request_params: dict[str, str | int] = {k: v for k, v in params.items() if v is not None}
+        request_params["key"] = self._api_key
+        async with self._request_slots:
+            response = await self._http_client.get(path, params=request_params)
+        if self._quota_tracker is not None:
+            self._quota_tracker.record(path)
+        response.raise_for_status()
+        return response.json()
+
+    async def resolve_channel_id(self, channel_identifier: str) -> str | None:
+        channel_id, handle_value = parse_channel_identifier(channel_identifier)
+        if channel_id or not handle_value:
+            return channel_id
+
+        return first_channel_id(await self._get("channels", handle_lookup_params(handle_value)))
+
+    async def get_uploads_playlist_id(self, channel_id: str) -> str | None:
+        return uploads_playlist_id_from_payload(await self._get("channels", uploads_playlist_params(channel_id)))
+
+    async def list_playlist_video_ids(
+        self, playlist_id: str, limit: int, stop_at_video_ids: set[str] | None = None
+    ) -> list[str]:
+        """List playlist video IDs in playlist order, up to `limit`.
+
+        When `stop_at_video_ids` is given, paging stops at the first ID in that set and only
+        the IDs before it are returned (the uploads playlist is newest-first).
+        """
+        collected_video_ids: list[str] = []
+        next_page_token: str | None = None
+
+        while len(collected_video_ids) < limit:
+            payload = await self._get("playlistItems", playlist_items_params(playlist_id, next_page_token))
+            page_video_ids = playlist_page_video_ids(payload)
+
+            if stop_at_video_ids:
+                known_index = next(
+                    (index for index, video_id in enumerate(page_video_ids) if video_id in stop_at_video_ids), None
+                )
+                if known_index is not None:
+                    collected_video_ids.extend(page_video_ids[:known_index])
+                    break
+
+            collected_video_ids.extend(page_video_ids)
+
+            next_page_token = payload.get("nextPageToken")
+            if not next_page_token:
+                break
+
+        return collected_video_ids[:limit]
+
+    async def search_video_ids(self, query: str, limit: int) -> list[str]:
+        collected_video_ids: list[str] = []
+        next_page_token: str | None = None
+
+        while len(collected_video_ids) < limit:
+            payload = await self._get("search", search_params(query, next_page_token))
+            collected_video_ids.extend(search_page_video_ids(payload))
+
+            next_page_token = payload.get("nextPageToken")
+            if not next_page_token:
+                break
+
+        return collected_video_ids[:limit]
+
+    async def get_videos_details(
+        self, video_ids: Iterable[str], part: str = DEFAULT_VIDEO_PARTS, fields: str | None = None
+    ) -> dict:
+        video_id_list = list(video_ids)
+        if not video_id_list:
+            return {"items": []}
+
+        return await self._get(
+            "videos",
+            {"part": part, "id": ",".join(video_id_list[:50]), "maxResults": 50, "fields": fields},
+        )
+
+    async def get_channels_metadata(self, channel_ids: Iterable[str], fields: str | None = None) -> list[dict]:
+        channel_id_list = [channel_id.strip() for channel_id in channel_ids if channel_id and channel_id.strip()]
+        if not channel_id_list:
+            return []
+
+        payload = await self._get(
+            "channels",
+            {"part": "snippet", "id": ",".join(channel_id_list[:50]), "maxResults": 50, "fields": fields},
+        )
+        items = payload.get("items", [])
+        return items if isinstance(items, list) else []
@@ -2,20 +2,146 @@ from typing import Iterable
 from urllib.parse import urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from yta_core.youtube.quota import QuotaTracker
 
 YOUTUBE_API_BASE_URL = "https://www.googleapis.com/youtube/v3"
+DEFAULT_VIDEO_PARTS = "snippet,contentDetails,statistics"
+
+# Google only serves gzip when the User-Agent also mentions it.
+HTTP_HEADERS = {"Accept-Encoding": "gzip", "User-Agent": "yta-core (gzip)"}
+
+HANDLE_LOOKUP_FIELDS = "items(id)"
+UPLOADS_PLAYLIST_FIELDS = "items(contentDetails(relatedPlaylists(uploads)))"
+PLAYLIST_ITEMS_FIELDS = "nextPageToken,items(contentDetails(videoId))"
+SEARCH_FIELDS = "nextPageToken,items(id(videoId))"
+
+
+def parse_channel_identifier(channel_identifier: str) -> tuple[str | None, str | None]:
+    """Split a channel identifier into (channel_id, handle) without calling the API.
+
+    Exactly one side is set when the identifier is usable: a UC... id when it can be read
+    straight from the value, otherwise an @handle that still needs a channels?forHandle= lookup.
+    """
+    raw_value = channel_identifier.strip()
+    if not raw_value:
+        return None, None
+
+    if raw_value.startswith("UC") and len(raw_value) >= 10:
+        return raw_value, None
+
+    if raw_value.startswith("http://") or raw_value.startswith("https://"):
+        parsed_url = urlparse(raw_value)
+        path = (parsed_url.path or "").strip("/")
+
+        if path.startswith("channel/"):
+            possible_id = path.split("/", 1)[1]
+            if possible_id.startswith("UC"):
+                return possible_id, None
+
+        if path.startswith("@"):
+            raw_value = path
+        elif path:
+            raw_value = path.split("/")[-1]
+
+    return None, raw_value if raw_value.startswith("@") else f"@{raw_value}"
+
+
+def handle_lookup_params(handle: str) -> dict[str, str | int | None]:
+    return {"part": "id", "forHandle": handle, "maxResults": 1, "fields": HANDLE_LOOKUP_FIELDS}
+
+
+def uploads_playlist_params(channel_id: str) -> dict[str, str | int | None]:
+    return {"part": "contentDetails", "id": channel_id, "maxResults": 1, "fields": UPLOADS_PLAYLIST_FIELDS}
+
+
+def playlist_items_params(playlist_id: str, page_token: str | None) -> dict[str, str | int | None]:
+    return {
+        "part": "contentDetails",
+        "playlistId": playlist_id,
+        "maxResults": 50,
+        "pageToken": page_token,
+        "fields": PLAYLIST_ITEMS_FIELDS,
+    }
+
+
+def search_params(query: str, page_token: str | None) -> dict[str, str | int | None]:
+    return {
+        "part": "id",
+        "q": query,
+        "type": "video",
+        "maxResults": 50,
+        "pageToken": page_token,
+        "order": "viewCount",
+        "fields": SEARCH_FIELDS,
+    }
+
+
+def first_channel_id(payload: dict) -> str | None:
+    items = payload.get("items", [])
+    if not items:
+        return None
+    channel_id = items[0].get("id")
+    return channel_id if isinstance(channel_id, str) else None
+
+
+def uploads_playlist_id_from_payload(payload: dict) -> str | None:
+    items = payload.get("items", [])
+    if not items:
+        return None
+    related_playlists = items[0].get("contentDetails", {}).get("relatedPlaylists", {})
+    return related_playlists.get("uploads")
+
+
+def playlist_page_video_ids(payload: dict) -> list[str]:
+    return [
+        video_id
+        for item in payload.get("items", [])
+        if (video_id := item.get("contentDetails", {}).get("videoId"))
+    ]
+
+
+def search_page_video_ids(payload: dict) -> list[str]:
+    return [video_id for item in payload.get("items", []) if (video_id := item.get("id", {}).get("videoId"))]
 
 
 class YouTubeClient:
-    def __init__(self, api_key: str) -> None:
+    def __init__(
+        self,
+        api_key: str,
+        pool_size: int = 10,
+        base_url: str = YOUTUBE_API_BASE_URL,
+        quota_tracker: QuotaTracker | None = None,
+    ) -> None:
         if not api_key:
             raise ValueError("YOUTUBE_API_KEY must be set.")
         self._api_key = api_key
+        self._quota_tracker = quota_tracker
+        self._base_url = base_url.rstrip("/")
+
+        # One keep-alive session per client so repeated calls reuse TCP/TLS connections.
+        self._http_session = requests.Session()
+        self._http_session.headers.update(HTTP_HEADERS)
+        http_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._http_session.mount("https://", http_adapter)
+        self._http_session.mount("http://", http_adapter)
+
+    def close(self) -> None:
+        self._http_session.close()
+
+    def __enter__(self) -> "YouTubeClient":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
 
     def _get(self, path: str, params: dict[str, str | int | None]) -> dict:
         request_params: dict[str, str | int] = {k: v for k, v in params.items() if v is not None}
         request_params["key"] = self._api_key
-        response = requests.get(f"{YOUTUBE_API_BASE_URL}/{path}", params=request_params, timeout=30)
+        response = self._http_session.get(f"{self._base_url}/{path}", params=request_params, timeout=30)
+        if self._quota_tracker is not None:
+            self._quota_tracker.record(path)
         response.raise_for_status()
         return response.json()
 
@@ -29,114 +155,85 @@ class YouTubeClient:
         - youtube URLs (/@handle, /channel/UC..., etc.)
         Returns UC... channel id or None.
         """
-        raw_value = channel_identifier.strip()
-        if not raw_value:
-            return None
-
-        if raw_value.startswith("UC") and len(raw_value) >= 10:
-            return raw_value
-
-        if raw_value.startswith("http://") or raw_value.startswith("https://"):
-            parsed_url = urlparse(raw_value)
-            path = (parsed_url.path or "").strip("/")
-
-            if path.startswith("channel/"):
-                possible_id = path.split("/", 1)[1]
-                if possible_id.startswith("UC"):
-                    return possible_id
+        channel_id, handle_value = parse_channel_identifier(channel_identifier)
+        if channel_id or not handle_value:
+            return channel_id
 
-            if path.startswith("@"):
-                raw_value = path
-            elif path:
-                raw_value = path.split("/")[-1]
-
-        handle_value = raw_value if raw_value.startswith("@") else f"@{raw_value}"
-
-        payload = self._get("channels", {"part": "id", "forHandle": handle_value, "maxResults": 1})
-        items = payload.get("items", [])
-        if not items:
-            return None
-
-        channel_id = items[0].get("id")
-        return channel_id if isinstance(channel_id, str) else None
+        return first_channel_id(self._get("channels", handle_lookup_params(handle_value)))
 
     def get_uploads_playlist_id(self, channel_id: str) -> str | None:
-        payload = self._get("channels", {"part": "contentDetails", "id": channel_id, "maxResults": 1})
-        items = payload.get("items", [])
-        if not items:
-            return None
-        related_playlists = items[0].get("contentDetails", {}).get("relatedPlaylists", {})
-        return related_playlists.get("uploads")
+        return uploads_playlist_id_from_payload(self._get("channels", uploads_playlist_params(channel_id)))
+
+    def list_playlist_video_ids(
+        self, playlist_id: str, limit: int, stop_at_video_ids: set[str] | None = None
+    ) -> list[str]:
+        """List playlist video IDs in playlist order, up to `limit`.
 
-    def list_playlist_video_ids(self, playlist_id: str, limit: int) -> list[str]:
+        When `stop_at_video_ids` is given, paging stops at the first ID in that set and only
+        the IDs before it are returned (the uploads playlist is newest-first).
+        """
         collected_video_ids: list[str] = []
         next_page_token: str | None = None
 
         while len(collected_video_ids) < limit:
-            payload = self._get(
-                "playlistItems",
-                {"part": "contentDetails", "playlistId": playlist_id, "maxResults": 50, "pageToken": next_page_token},
-            )
-            for item in payload.get("items", []):
-                video_id = item.get("contentDetails", {}).get("videoId")
-                if video_id:
-                    collected_video_ids.append(video_id)
-                if len(collected_video_ids) >= limit:
+            payload = self._get("playlistItems", playlist_items_params(playlist_id, next_page_token))
+            page_video_ids = playlist_page_video_ids(payload)
+
+            if stop_at_video_ids:
+                known_index = next(
+                    (index for index, video_id in enumerate(page_video_ids) if video_id in stop_at_video_ids), None
+                )
+                if known_index is not None:
+                    collected_video_ids.extend(page_video_ids[:known_index])
                     break
 
+            collected_video_ids.extend(page_video_ids)
+
             next_page_token = payload.get("nextPageToken")
             if not next_page_token:
                 break
 
-        return collected_video_ids
+        return collected_video_ids[:limit]
 
     def search_video_ids(self, query: str, limit: int) -> list[str]:
         collected_video_ids: list[str] = []
         next_page_token: str | None = None
 
         while len(collected_video_ids) < limit:
-            payload = self._get(
-                "search",
-                {
-                    "part": "id",
-                    "q": query,
-                    "type": "video",
-                    "maxResults": 50,
-                    "pageToken": next_page_token,
-                    "order": "viewCount",
-                },
-            )
-            for item in payload.get("items", []):
-                video_id = item.get("id", {}).get("videoId")
-                if video_id:
-                    collected_video_ids.append(video_id)
-                if len(collected_video_ids) >= limit:
-                    break
+            payload = self._get("search", search_params(query, next_page_token))
+            collected_video_ids.extend(search_page_video_ids(payload))
 
             next_page_token = payload.get("nextPageToken")
             if not next_page_token:
                 break
 
-        return collected_video_ids
+        return collected_video_ids[:limit]
 
-    def get_videos_details(self, video_ids: Iterable[str]) -> dict:
+    def get_videos_details(
+        self, video_ids: Iterable[str], part: str = DEFAULT_VIDEO_PARTS, fields: str | None = None
+    ) -> dict:
+        """Fetch videos.list for up to 50 IDs.
+
+        `fields` is passed through as a partial-response projection, e.g.
+        "items(id,statistics(viewCount))", so callers only pay for what they read.
+        """
         video_id_list = list(video_ids)
         if not video_id_list:
             return {"items": []}
 
         return self._get(
             "videos",
-            {"part": "snippet,contentDetails,statistics", "id": ",".join(video_id_list[:50]), "maxResults": 50},
+            {"part": part, "id": ",".join(video_id_list[:50]), "maxResults": 50, "fields": fields},
         )
 
-    def get_channels_metadata(self, channel_ids: Iterable[str]) -> list[dict]:
+    def get_channels_metadata(self, channel_ids: Iterable[str], fields: str | None = None) -> list[dict]:
         channel_id_list = [channel_id.strip() for channel_id in channel_ids if channel_id and channel_id.strip()]
         if not channel_id_list:
             return []
 
         payload = self._get(
             "channels",
-            {"part": "snippet", "id": ",".join(channel_id_list[:50]), "maxResults": 50},
+            {"part": "snippet", "id": ",".join(channel_id_list[:50]), "maxResults": 50, "fields": fields},
         )
         items = payload.get("items", [])
         return items if isinstance(items, list) else []
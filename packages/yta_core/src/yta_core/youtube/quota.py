@@ -0,0 +1,116 @@
+import threading
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, SessionTransaction
+
+from yta_core.db.models import ApiQuotaUsage
+
+# YouTube Data API quota resets at midnight Pacific time.
+QUOTA_RESET_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+# Unit cost per call, keyed by the API path used in `_get`. Unknown paths count as 1.
+QUOTA_COST_BY_ENDPOINT: dict[str, int] = {
+    "search": 100,
+    "videos": 1,
+    "playlistItems": 1,
+    "channels": 1,
+}
+
+def quota_cost(endpoint: str) -> int:
+    return QUOTA_COST_BY_ENDPOINT.get(endpoint, 1)
+
+def quota_day(current_time: datetime) -> date:
+    return current_time.astimezone(QUOTA_RESET_TIMEZONE).date()
+
+def next_quota_reset(current_time: datetime) -> datetime:
+    next_day = quota_day(current_time) + timedelta(days=1)
+    return datetime.combine(next_day, time.min, tzinfo=QUOTA_RESET_TIMEZONE)
+
+UsageTotals = dict[tuple[date, str], list[int]]
+
+def _merge_usage(target: UsageTotals, source: UsageTotals) -> None:
+    for usage_key, (units, calls) in source.items():
+        totals = target.setdefault(usage_key, [0, 0])
+        totals[0] += units
+        totals[1] += calls
+
+class QuotaTracker:
+    """Thread-safe in-memory tally of API units, flushed to `api_quota_usage` per quota day.
+
+    Pass one instance to the YouTube clients; every request is recorded before its
+    response is checked, since failed requests are billed too.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: UsageTotals = {}
+        # Usage written by `flush` in a transaction that has not committed yet, per session.
+        self._uncommitted_by_session: dict[Session, UsageTotals] = {}
+
+    def record(self, endpoint: str, current_time: datetime | None = None) -> None:
+        usage_key = (quota_day(current_time or datetime.now(QUOTA_RESET_TIMEZONE)), endpoint)
+        with self._lock:
+            totals = self._pending.setdefault(usage_key, [0, 0])
+            totals[0] += quota_cost(endpoint)
+            totals[1] += 1
+
+    def pending_units(self) -> int:
+        """Units recorded but not yet committed to `api_quota_usage`."""
+        with self._lock:
+            return sum(
+                units
+                for usage in (self._pending, *self._uncommitted_by_session.values())
+                for units, _ in usage.values()
+            )
+
+    def flush(self, database_session: Session) -> None:
+        """Add pending usage to the persisted daily totals (caller commits).
+
+        The usage leaves the tracker only when that transaction commits; if it rolls back
+        instead, it is returned to the pending tally for the next flush.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            if not event.contains(database_session, "after_commit", self._forget_committed):
+                event.listen(database_session, "after_commit", self._forget_committed)
+                event.listen(database_session, "after_transaction_end", self._restore_uncommitted)
+            _merge_usage(self._uncommitted_by_session.setdefault(database_session, {}), pending)
+
+        insert_statement = insert(ApiQuotaUsage).values(
+            [
+                {"usage_date": usage_date, "endpoint": endpoint, "units": units, "calls": calls}
+                for (usage_date, endpoint), (units, calls) in pending.items()
+            ]
+        )
+        database_session.execute(
+            insert_statement.on_conflict_do_update(
+                index_elements=[ApiQuotaUsage.usage_date, ApiQuotaUsage.endpoint],
+                set_={
+                    "units": ApiQuotaUsage.units + insert_statement.excluded.units,
+                    "calls": ApiQuotaUsage.calls + insert_statement.excluded.calls,
+                },
+            )
+        )
+
+    def _forget_committed(self, database_session: Session) -> None:
+        with self._lock:
+            self._uncommitted_by_session.pop(database_session, None)
+
+    def _restore_uncommitted(self, database_session: Session, session_transaction: SessionTransaction) -> None:
+        # Fires after every transaction end; anything still uncommitted here was rolled back or closed.
+        if session_transaction.parent is not None:
+            return
+        with self._lock:
+            uncommitted = self._uncommitted_by_session.pop(database_session, None)
+            if uncommitted:
+                _merge_usage(self._pending, uncommitted)
+
+def units_used_on(database_session: Session, usage_date: date) -> int:
+    return database_session.execute(
+        select(func.coalesce(func.sum(ApiQuotaUsage.units), 0)).where(ApiQuotaUsage.usage_date == usage_date)
+    ).scalar_one()
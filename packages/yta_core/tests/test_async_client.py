@@ -0,0 +1,126 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+
+from yta_core.youtube.async_client import AsyncYouTubeClient
+from yta_core.youtube.quota import QuotaTracker
+
+STUB_LATENCY_SECONDS = 0.05
+PLAYLIST_PAGES = {
+    None: (["v5", "v4"], "page-2"),
+    "page-2": (["v3", "v2"], "page-3"),
+    "page-3": (["v1"], None),
+}
+
+class StubYouTubeApi(ThreadingHTTPServer):
+    """Local stand-in for the Data API that records how many requests overlap."""
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), StubYouTubeApiHandler)
+        self.in_flight_lock = threading.Lock()
+        self.in_flight_requests = 0
+        self.max_in_flight_requests = 0
+        self.request_paths: list[str] = []
+
+class StubYouTubeApiHandler(BaseHTTPRequestHandler):
+    server: StubYouTubeApi
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        stub_api = self.server
+        with stub_api.in_flight_lock:
+            stub_api.in_flight_requests += 1
+            stub_api.max_in_flight_requests = max(stub_api.max_in_flight_requests, stub_api.in_flight_requests)
+        try:
+            time.sleep(STUB_LATENCY_SECONDS)
+            request_url = urlparse(self.path)
+            path = request_url.path.rsplit("/", 1)[-1]
+            query = {name: values[0] for name, values in parse_qs(request_url.query).items()}
+            stub_api.request_paths.append(path)
+            self._send_json(self._payload(path, query))
+        finally:
+            with stub_api.in_flight_lock:
+                stub_api.in_flight_requests -= 1
+
+    def _payload(self, path: str, query: dict[str, str]) -> dict:
+        if path == "videos":
+            return {"items": [{"id": video_id} for video_id in query["id"].split(",")]}
+        if path == "channels":
+            return {"items": [{"id": "UC" + query.get("forHandle", "unknown").lstrip("@")}]}
+        if path == "playlistItems":
+            page_video_ids, next_page_token = PLAYLIST_PAGES[query.get("pageToken")]
+            payload: dict = {"items": [{"contentDetails": {"videoId": video_id}} for video_id in page_video_ids]}
+            if next_page_token:
+                payload["nextPageToken"] = next_page_token
+            return payload
+        return {}
+
+    def _send_json(self, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def stub_api():
+    stub_api = StubYouTubeApi()
+    server_thread = threading.Thread(target=stub_api.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    server_thread.start()
+    yield stub_api
+    stub_api.shutdown()
+    stub_api.server_close()
+
+def stub_base_url(stub_api: StubYouTubeApi) -> str:
+    return f"http://127.0.0.1:{stub_api.server_address[1]}/youtube/v3"
+
+def test_concurrent_calls_are_limited_per_client(stub_api: StubYouTubeApi) -> None:
+    quota_tracker = QuotaTracker()
+
+    async def fetch_all() -> list[dict]:
+        async with AsyncYouTubeClient(
+            "test-key", max_concurrency=3, base_url=stub_base_url(stub_api), quota_tracker=quota_tracker
+        ) as youtube_client:
+            return await asyncio.gather(
+                *(youtube_client.get_videos_details([f"video-{index}"]) for index in range(12))
+            )
+
+    payloads = asyncio.run(fetch_all())
+
+    assert [payload["items"][0]["id"] for payload in payloads] == [f"video-{index}" for index in range(12)]
+    assert stub_api.max_in_flight_requests == 3
+    assert quota_tracker.pending_units() == 12
+
+def test_handle_is_resolved_through_the_api(stub_api: StubYouTubeApi) -> None:
+    async def resolve() -> tuple[str | None, str | None]:
+        async with AsyncYouTubeClient("test-key", base_url=stub_base_url(stub_api)) as youtube_client:
+            return (
+                await youtube_client.resolve_channel_id("@somecreator"),
+                await youtube_client.resolve_channel_id("UCalready-an-id-000000000"),
+            )
+
+    resolved_from_handle, passed_through = asyncio.run(resolve())
+    assert resolved_from_handle == "UCsomecreator"
+    assert passed_through == "UCalready-an-id-000000000"
+    assert stub_api.request_paths == ["channels"]
+
+def test_playlist_paging_stops_at_known_videos(stub_api: StubYouTubeApi) -> None:
+    async def list_video_ids() -> tuple[list[str], list[str]]:
+        async with AsyncYouTubeClient("test-key", base_url=stub_base_url(stub_api)) as youtube_client:
+            return (
+                await youtube_client.list_playlist_video_ids("UUplaylist", limit=10),
+                await youtube_client.list_playlist_video_ids("UUplaylist", limit=10, stop_at_video_ids={"v3"}),
+            )
+
+    all_video_ids, new_video_ids = asyncio.run(list_video_ids())
+    assert all_video_ids == ["v5", "v4", "v3", "v2", "v1"]
+    assert new_video_ids == ["v5", "v4"]
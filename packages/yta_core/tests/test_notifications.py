@@ -0,0 +1,28 @@
+from sqlalchemy.dialects import postgresql
+
+from yta_core.db.notifications import (
+    MAX_NOTIFY_PAYLOAD_LENGTH,
+    TRACKER_CHANGES_CHANNEL,
+    parse_tracker_changes_payload,
+    tracker_changes_notification,
+)
+
+def notification_parameters(tracker_ids: list[int]) -> list:
+    return list(tracker_changes_notification(tracker_ids).compile(dialect=postgresql.dialect()).params.values())
+
+def test_notification_carries_comma_separated_ids() -> None:
+    assert notification_parameters([3, 1, 2]) == [TRACKER_CHANGES_CHANNEL, "3,1,2"]
+
+def test_oversized_notification_asks_for_full_reload() -> None:
+    tracker_ids = list(range(MAX_NOTIFY_PAYLOAD_LENGTH))
+    payload = notification_parameters(tracker_ids)[1]
+    assert payload == ""
+    assert parse_tracker_changes_payload(payload) is None
+
+def test_payload_round_trips_tracker_ids() -> None:
+    payload = notification_parameters([7, 42])[1]
+    assert parse_tracker_changes_payload(payload) == [7, 42]
+
+def test_unparseable_payload_asks_for_full_reload() -> None:
+    assert parse_tracker_changes_payload("1,two,3") is None
+    assert parse_tracker_changes_payload(" , ") is None
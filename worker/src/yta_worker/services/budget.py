@@ -0,0 +1,147 @@
+import math
+from datetime import datetime, timedelta
+from typing import Callable, TypeVar
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from yta_core.db.models import Tracker, TrackerCandidate, TrackerType
+from yta_core.youtube.quota import next_quota_reset, quota_cost
+from yta_worker.services.discovery import DiscoveryGroup
+
+WorkItem = TypeVar("WorkItem")
+
+# Relative value of keeping a tracker of each type fresh; a tight budget protects channel trackers first.
+TRACKER_TYPE_VALUE_WEIGHT = {TrackerType.channel: 2.0, TrackerType.search: 1.0}
+
+def estimate_discovery_units(tracker_type: TrackerType, candidate_pool_size: int) -> int:
+    page_count = max(1, math.ceil(candidate_pool_size / 50))
+    if tracker_type == TrackerType.search:
+        return quota_cost("search") * page_count
+    return quota_cost("channels") + quota_cost("playlistItems") * page_count
+
+def estimate_snapshot_tick_units(tracked_video_count: int) -> int:
+    return math.ceil(tracked_video_count / 50) * quota_cost("videos")
+
+def projected_snapshot_units(database_session: Session, current_time: datetime, snapshot_interval_minutes: int) -> int:
+    """Units the snapshot stage still needs before the quota resets, at the current tracked set size.
+
+    Each video is counted once, at the tightest snapshot cadence among the trackers it belongs to.
+    """
+    tightest_interval_by_video = (
+        select(
+            TrackerCandidate.video_id.label("video_id"),
+            func.min(Tracker.snapshot_interval_hours).label("interval_hours"),
+        )
+        .join(Tracker, Tracker.id == TrackerCandidate.tracker_id)
+        .where(Tracker.is_active.is_(True))
+        .group_by(TrackerCandidate.video_id)
+        .subquery()
+    )
+    video_counts_by_interval = database_session.execute(
+        select(tightest_interval_by_video.c.interval_hours, func.count()).group_by(
+            tightest_interval_by_video.c.interval_hours
+        )
+    ).all()
+
+    time_until_reset = next_quota_reset(current_time) - current_time
+    projected_units = 0
+    for interval_hours, tracked_video_count in video_counts_by_interval:
+        interval_minutes = max(interval_hours * 60, snapshot_interval_minutes, 1)
+        remaining_ticks = math.ceil(time_until_reset / timedelta(minutes=interval_minutes))
+        projected_units += remaining_ticks * estimate_snapshot_tick_units(tracked_video_count)
+    return projected_units
+
+def staleness_weight(due_at: datetime | None, current_time: datetime, interval_minutes: int) -> float:
+    """1.0 when the work has just come due, plus 1.0 for every interval it has been overdue since."""
+    if due_at is None:
+        return 1.0
+    return 1.0 + max((current_time - due_at) / timedelta(minutes=max(interval_minutes, 1)), 0.0)
+
+def plan_by_value_per_unit(
+    work_items: list[WorkItem],
+    value_of: Callable[[WorkItem], float],
+    units_of: Callable[[WorkItem], int],
+    available_units: int,
+) -> tuple[list[WorkItem], list[WorkItem]]:
+    """Split work into (run now, defer) by admitting the highest value per unit first while it fits."""
+    approved_items: list[WorkItem] = []
+    deferred_items: list[WorkItem] = []
+    ranked_items = sorted(work_items, key=lambda work_item: value_of(work_item) / max(units_of(work_item), 1), reverse=True)
+    for work_item in ranked_items:
+        estimated_units = units_of(work_item)
+        if estimated_units > available_units:
+            deferred_items.append(work_item)
+            continue
+        approved_items.append(work_item)
+        available_units -= estimated_units
+    return approved_items, deferred_items
+
+def discovery_group_units(group: DiscoveryGroup) -> int:
+    if group.uploads_playlist_id and group.previous_video_ids:
+        # Incremental channel fetch: usually a single playlistItems page.
+        return quota_cost("playlistItems")
+    return estimate_discovery_units(group.type, group.candidate_pool_size)
+
+def plan_discovery_within_budget(
+    groups: list[DiscoveryGroup],
+    remaining_units: int,
+    reserved_units: int,
+    current_time: datetime,
+    interval_minutes_by_type: dict[TrackerType, int],
+) -> tuple[list[DiscoveryGroup], list[DiscoveryGroup]]:
+    """Split source groups that need a fetch into (run now, defer until the quota resets).
+
+    Snapshot spend for the rest of the day is reserved first. Channel sources are cheap (a few
+    units per pool) and always run. Search sources are worth the summed staleness of the trackers
+    sharing them and are admitted by value per unit while they fit in what is left.
+    """
+    channel_groups = [group for group in groups if group.type != TrackerType.search]
+    search_groups = [group for group in groups if group.type == TrackerType.search]
+    available_units = remaining_units - reserved_units - sum(discovery_group_units(group) for group in channel_groups)
+
+    def group_value(group: DiscoveryGroup) -> float:
+        return sum(
+            staleness_weight(tracker.next_discovery_at, current_time, interval_minutes_by_type[tracker.type])
+            for tracker in group.trackers
+        )
+
+    approved_search_groups, deferred_groups = plan_by_value_per_unit(
+        search_groups, group_value, discovery_group_units, available_units
+    )
+    return channel_groups + approved_search_groups, deferred_groups
+
+def tracker_candidate_counts(database_session: Session, tracker_ids: list[int]) -> dict[int, int]:
+    candidate_count_by_tracker = dict.fromkeys(tracker_ids, 0)
+    for tracker_id, candidate_count in database_session.execute(
+        select(TrackerCandidate.tracker_id, func.count())
+        .where(TrackerCandidate.tracker_id.in_(tracker_ids))
+        .group_by(TrackerCandidate.tracker_id)
+    ):
+        candidate_count_by_tracker[tracker_id] = candidate_count
+    return candidate_count_by_tracker
+
+def plan_snapshots_within_budget(
+    database_session: Session,
+    trackers: list[Tracker],
+    remaining_units: int,
+    current_time: datetime,
+    snapshot_interval_minutes: int,
+) -> tuple[list[Tracker], list[Tracker]]:
+    """Split due trackers into (snapshot now, defer until the quota resets) by value per unit.
+
+    A tracker costs one videos.list unit per 50 candidates (shared videos are fetched once, so
+    this over-estimates) and is worth its type-weighted snapshot staleness; when the day's quota
+    runs short, search trackers and large pools give way first.
+    """
+    candidate_count_by_tracker = tracker_candidate_counts(database_session, [tracker.id for tracker in trackers])
+
+    def tracker_value(tracker: Tracker) -> float:
+        interval_minutes = max(tracker.snapshot_interval_hours * 60, snapshot_interval_minutes, 1)
+        return TRACKER_TYPE_VALUE_WEIGHT[tracker.type] * staleness_weight(
+            tracker.next_snapshot_at, current_time, interval_minutes
+        )
+
+    def tracker_units(tracker: Tracker) -> int:
+        return estimate_snapshot_tick_units(candidate_count_by_tracker[tracker.id])
+
+    return plan_by_value_per_unit(trackers, tracker_value, tracker_units, remaining_units)
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from sqlalchemy import or_, select, union
+from sqlalchemy.orm import Session
+
+from yta_core.channels import CHANNEL_META_BATCH_SIZE, CHANNEL_META_FIELDS, channel_rows_from_items, upsert_channels
+from yta_core.db.models import Channel, Tracker, TrackerCandidate, TrackerType, Video
+from yta_core.time_utils import utc_now
+from yta_core.youtube.client import YouTubeClient
+
+def due_channel_ids(database_session: Session, current_time: datetime, limit: int) -> list[str]:
+    """Channels of active trackers and their candidate videos with no `channels` row or one due for refresh.
+
+    Never-fetched channels come first, then the longest overdue.
+    """
+    tracked_channel_ids = union(
+        select(Video.channel_id.label("channel_id"))
+        .join(TrackerCandidate, TrackerCandidate.video_id == Video.video_id)
+        .join(Tracker, Tracker.id == TrackerCandidate.tracker_id)
+        .where(Tracker.is_active.is_(True))
+        .where(Video.channel_id.is_not(None)),
+        select(Tracker.channel_id.label("channel_id"))
+        .where(Tracker.is_active.is_(True))
+        .where(Tracker.type == TrackerType.channel)
+        .where(Tracker.channel_id.is_not(None)),
+    ).subquery()
+
+    return list(
+        database_session.execute(
+            select(tracked_channel_ids.c.channel_id)
+            .outerjoin(Channel, Channel.channel_id == tracked_channel_ids.c.channel_id)
+            .where(or_(Channel.channel_id.is_(None), Channel.expires_at <= current_time))
+            .order_by(Channel.expires_at.asc().nulls_first(), tracked_channel_ids.c.channel_id)
+            .limit(limit)
+        ).scalars()
+    )
+
+def refresh_channel_metadata_batch(
+    database_session: Session, youtube_client: YouTubeClient, refresh_interval: timedelta
+) -> int:
+    """Fetch and store one channels.list batch of due channels; returns how many were refreshed (caller commits)."""
+    channel_ids = due_channel_ids(database_session, utc_now(), CHANNEL_META_BATCH_SIZE)
+    if not channel_ids:
+        return 0
+
+    items = youtube_client.get_channels_metadata(channel_ids, fields=CHANNEL_META_FIELDS)
+    upsert_channels(database_session, channel_rows_from_items(items, channel_ids, utc_now(), refresh_interval))
+    return len(channel_ids)
@@ -1,21 +1,196 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
-from yta_core.db.models import Tracker, TrackerType
-from yta_core.youtube.client import YouTubeClient
+from yta_core.db.models import DiscoverySource, Tracker, TrackerType
+from yta_core.time_utils import hour_bucket
+from yta_core.youtube.async_client import AsyncYouTubeClient
+from yta_core.youtube.quota import QuotaTracker
 from yta_worker.services.candidates import upsert_tracker_candidates
 
-def run_tracker_discovery(database_session: Session, youtube_client: YouTubeClient, tracker: Tracker) -> None:
-    if tracker.type == TrackerType.channel:
-        if not tracker.channel_id:
-            return
-        uploads_playlist_id = youtube_client.get_uploads_playlist_id(tracker.channel_id)
-        if not uploads_playlist_id:
-            return
-        candidate_video_ids = youtube_client.list_playlist_video_ids(uploads_playlist_id, tracker.candidate_pool_size)
-        upsert_tracker_candidates(database_session, tracker, candidate_video_ids)
+@dataclass
+class DiscoveryGroup:
+    """Trackers that discover from the same source and can share one API fetch."""
+
+    source_key: str
+    type: TrackerType
+    channel_id: str | None = None
+    search_query: str | None = None
+    trackers: list[Tracker] = field(default_factory=list)
+    uploads_playlist_id: str | None = None
+    # Previous result, newest first; set when an incremental channel fetch can extend it.
+    previous_video_ids: list[str] = field(default_factory=list)
+
+    @property
+    def candidate_pool_size(self) -> int:
+        return max(tracker.candidate_pool_size for tracker in self.trackers)
+
+def normalize_search_query(search_query: str) -> str:
+    return " ".join(search_query.lower().split())
+
+def discovery_source_key(tracker: Tracker) -> str | None:
+    if tracker.type == TrackerType.channel and tracker.channel_id:
+        return f"channel:{tracker.channel_id}"
+    if tracker.type == TrackerType.search and tracker.search_query and normalize_search_query(tracker.search_query):
+        return f"search:{normalize_search_query(tracker.search_query)}"
+    return None
+
+def group_trackers_by_source(trackers: list[Tracker]) -> tuple[list[DiscoveryGroup], list[Tracker]]:
+    """Return (groups keyed by source, trackers with nothing to discover from)."""
+    groups_by_key: dict[str, DiscoveryGroup] = {}
+    sourceless_trackers: list[Tracker] = []
+
+    for tracker in trackers:
+        source_key = discovery_source_key(tracker)
+        if source_key is None:
+            sourceless_trackers.append(tracker)
+            continue
+
+        group = groups_by_key.get(source_key)
+        if group is None:
+            group = groups_by_key[source_key] = DiscoveryGroup(
+                source_key=source_key,
+                type=tracker.type,
+                channel_id=tracker.channel_id if tracker.type == TrackerType.channel else None,
+                search_query=normalize_search_query(tracker.search_query or "") if tracker.type == TrackerType.search else None,
+            )
+        group.trackers.append(tracker)
+
+    return list(groups_by_key.values()), sourceless_trackers
+
+def load_cached_sources(database_session: Session, groups: list[DiscoveryGroup]) -> dict[str, DiscoverySource]:
+    if not groups:
+        return {}
+
+    cached_sources = database_session.execute(
+        select(DiscoverySource).where(DiscoverySource.source_key.in_([group.source_key for group in groups]))
+    ).scalars().all()
+    return {source.source_key: source for source in cached_sources}
+
+def fresh_source_results(
+    groups: list[DiscoveryGroup],
+    cached_sources: dict[str, DiscoverySource],
+    fresh_after_by_type: dict[TrackerType, datetime],
+) -> dict[str, list[str]]:
+    """Cached video IDs for groups whose source was fetched recently enough and deep enough."""
+    fresh_results: dict[str, list[str]] = {}
+    for group in groups:
+        cached_source = cached_sources.get(group.source_key)
+        if cached_source is None:
+            continue
+        if cached_source.fetched_at < fresh_after_by_type[group.type]:
+            continue
+        if cached_source.requested_limit < group.candidate_pool_size:
+            continue
+        fresh_results[group.source_key] = list(cached_source.video_ids)
+    return fresh_results
+
+def prime_groups_from_cache(groups: list[DiscoveryGroup], cached_sources: dict[str, DiscoverySource]) -> None:
+    """Carry the cached uploads playlist and previous result into channel groups."""
+    for group in groups:
+        cached_source = cached_sources.get(group.source_key)
+        if group.type != TrackerType.channel or cached_source is None:
+            continue
+        group.uploads_playlist_id = cached_source.uploads_playlist_id
+        if cached_source.requested_limit >= group.candidate_pool_size:
+            group.previous_video_ids = list(cached_source.video_ids)
+
+def store_source_results(
+    database_session: Session, fetched_groups: dict[str, tuple[DiscoveryGroup, list[str]]], fetched_at: datetime
+) -> None:
+    if not fetched_groups:
         return
 
-    if tracker.type == TrackerType.search:
-        if not tracker.search_query:
-            return
-        candidate_video_ids = youtube_client.search_video_ids(tracker.search_query, tracker.candidate_pool_size)
-        upsert_tracker_candidates(database_session, tracker, candidate_video_ids)
+    insert_statement = insert(DiscoverySource).values(
+        [
+            {
+                "source_key": source_key,
+                "video_ids": video_ids,
+                "requested_limit": group.candidate_pool_size,
+                "uploads_playlist_id": group.uploads_playlist_id,
+                "fetched_at": fetched_at,
+            }
+            for source_key, (group, video_ids) in fetched_groups.items()
+        ]
+    )
+    database_session.execute(
+        insert_statement.on_conflict_do_update(
+            index_elements=[DiscoverySource.source_key],
+            set_={
+                "video_ids": insert_statement.excluded.video_ids,
+                "requested_limit": insert_statement.excluded.requested_limit,
+                "uploads_playlist_id": insert_statement.excluded.uploads_playlist_id,
+                "fetched_at": insert_statement.excluded.fetched_at,
+            },
+        )
+    )
+
+async def fetch_group_candidate_ids(youtube_client: AsyncYouTubeClient, group: DiscoveryGroup) -> list[str] | None:
+    if group.type == TrackerType.channel and group.channel_id:
+        if not group.uploads_playlist_id:
+            group.uploads_playlist_id = await youtube_client.get_uploads_playlist_id(group.channel_id)
+        if not group.uploads_playlist_id:
+            return None
+
+        if not group.previous_video_ids:
+            return await youtube_client.list_playlist_video_ids(group.uploads_playlist_id, group.candidate_pool_size)
+
+        # Incremental: page only until the newest upload we already know about.
+        new_video_ids = await youtube_client.list_playlist_video_ids(
+            group.uploads_playlist_id, group.candidate_pool_size, stop_at_video_ids=set(group.previous_video_ids)
+        )
+        seen_video_ids = set(new_video_ids)
+        merged_video_ids = new_video_ids + [
+            video_id for video_id in group.previous_video_ids if video_id not in seen_video_ids
+        ]
+        return merged_video_ids[: group.candidate_pool_size]
+
+    if group.type == TrackerType.search and group.search_query:
+        return await youtube_client.search_video_ids(group.search_query, group.candidate_pool_size)
+
+    return None
+
+async def fetch_candidate_ids_for_groups(
+    youtube_client: AsyncYouTubeClient, groups: list[DiscoveryGroup]
+) -> dict[str, list[str] | None | BaseException]:
+    """Run discovery API calls for all source groups concurrently.
+
+    Failures are returned per group instead of raised, so one bad source does not
+    discard the results of the others.
+    """
+    results = await asyncio.gather(
+        *(fetch_group_candidate_ids(youtube_client, group) for group in groups),
+        return_exceptions=True,
+    )
+    return {group.source_key: result for group, result in zip(groups, results)}
+
+async def discover_candidate_ids(
+    api_key: str, groups: list[DiscoveryGroup], max_concurrency: int, quota_tracker: QuotaTracker | None = None
+) -> dict[str, list[str] | None | BaseException]:
+    async with AsyncYouTubeClient(
+        api_key, max_concurrency=max_concurrency, quota_tracker=quota_tracker
+    ) as youtube_client:
+        return await fetch_candidate_ids_for_groups(youtube_client, groups)
+
+def apply_group_discovery(database_session: Session, group: DiscoveryGroup, candidate_video_ids: list[str] | None) -> None:
+    """Fan one source result out to every subscribed tracker, cut to its own pool size."""
+    if candidate_video_ids is None:
+        return
+    for tracker in group.trackers:
+        upsert_tracker_candidates(database_session, tracker, candidate_video_ids[: tracker.candidate_pool_size])
+
+def source_freshness_cutoffs(
+    current_time: datetime, channel_interval_minutes: int, search_interval_minutes: int
+) -> dict[TrackerType, datetime]:
+    """Oldest `fetched_at` still reusable, per tracker type.
+
+    Discovery is rescheduled to `hour_bucket(now) + interval`, so a result fetched during
+    bucket B stays valid until B + interval; a tracker due later must refetch.
+    """
+    current_bucket = hour_bucket(current_time)
+    return {
+        TrackerType.channel: current_bucket - timedelta(minutes=channel_interval_minutes) + timedelta(hours=1),
+        TrackerType.search: current_bucket - timedelta(minutes=search_interval_minutes) + timedelta(hours=1),
+    }
@@ -0,0 +1,105 @@
+import os
+import socket
+import uuid
+from datetime import timedelta
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+from yta_core.db.models import Tracker, WorkLease
+from yta_core.time_utils import utc_now
+
+DISCOVERY_JOB = "discovery"
+SNAPSHOT_JOB = "snapshot"
+
+def make_worker_identity() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def claim_due_trackers(
+    database_session: Session,
+    job_kind: str,
+    due_column: InstrumentedAttribute,
+    worker_identity: str,
+    lease_seconds: int,
+    limit: int,
+) -> list[Tracker]:
+    """Lease up to `limit` due trackers for this worker and commit the lease.
+
+    Candidate rows are picked with FOR UPDATE SKIP LOCKED, so concurrent workers never
+    pick the same tracker; the lease row then keeps them apart after the commit until it
+    is released or expires. Expired leases (a crashed worker) are taken over.
+    """
+    current_time = utc_now()
+    live_lease = select(WorkLease.tracker_id).where(
+        WorkLease.job_kind == job_kind,
+        WorkLease.tracker_id == Tracker.id,
+        WorkLease.expires_at > current_time,
+    )
+    due_tracker_ids = database_session.execute(
+        select(Tracker.id)
+        .where(Tracker.is_active.is_(True), due_column <= current_time, ~live_lease.exists())
+        .order_by(due_column, Tracker.id)
+        .limit(limit)
+        .with_for_update(of=Tracker, skip_locked=True)
+    ).scalars().all()
+    if not due_tracker_ids:
+        database_session.commit()
+        return []
+
+    lease_insert = insert(WorkLease).values(
+        [
+            {
+                "job_kind": job_kind,
+                "tracker_id": tracker_id,
+                "owner": worker_identity,
+                "expires_at": current_time + timedelta(seconds=lease_seconds),
+            }
+            for tracker_id in due_tracker_ids
+        ]
+    )
+    claimed_tracker_ids = database_session.execute(
+        lease_insert.on_conflict_do_update(
+            index_elements=[WorkLease.job_kind, WorkLease.tracker_id],
+            set_={"owner": lease_insert.excluded.owner, "expires_at": lease_insert.excluded.expires_at},
+            where=WorkLease.expires_at <= current_time,
+        ).returning(WorkLease.tracker_id)
+    ).scalars().all()
+    database_session.commit()
+
+    if not claimed_tracker_ids:
+        return []
+    return list(
+        database_session.execute(
+            select(Tracker).where(Tracker.id.in_(claimed_tracker_ids)).order_by(due_column, Tracker.id)
+        ).scalars().all()
+    )
+
+def release_tracker_leases(
+    database_session: Session, job_kind: str, tracker_ids: list[int], worker_identity: str
+) -> None:
+    """Drop this worker's leases; commit together with the work so the two land atomically."""
+    if not tracker_ids:
+        return
+    database_session.execute(
+        delete(WorkLease).where(
+            WorkLease.job_kind == job_kind,
+            WorkLease.tracker_id.in_(tracker_ids),
+            WorkLease.owner == worker_identity,
+        )
+    )
+
+def extend_tracker_leases(
+    database_session: Session, job_kind: str, tracker_ids: list[int], worker_identity: str, lease_seconds: int
+) -> None:
+    """Push this worker's leases out again, so long-running work is not taken over mid-flight (caller commits)."""
+    if not tracker_ids:
+        return
+    database_session.execute(
+        update(WorkLease)
+        .where(
+            WorkLease.job_kind == job_kind,
+            WorkLease.tracker_id.in_(tracker_ids),
+            WorkLease.owner == worker_identity,
+        )
+        .values(expires_at=utc_now() + timedelta(seconds=lease_seconds))
+    )
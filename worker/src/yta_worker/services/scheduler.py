@@ -0,0 +1,130 @@
+import heapq
+import time
+from datetime import datetime
+import psycopg
+from sqlalchemy import or_, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from yta_core.db.models import Tracker
+from yta_core.db.notifications import TRACKER_CHANGES_CHANNEL, parse_tracker_changes_payload
+from yta_worker.services.leases import DISCOVERY_JOB, SNAPSHOT_JOB
+
+TrackerDeadlineRow = tuple[int, datetime | None, datetime | None]
+
+class TrackerDeadlineQueue:
+    """Min-heap of (due time, job kind, tracker id) for the worker's tracker jobs.
+
+    Changing a deadline pushes a new entry and leaves the old one in place; superseded entries
+    are discarded when they reach the top, so updates stay O(log n).
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[datetime, str, int]] = []
+        self._deadline_by_job: dict[tuple[str, int], datetime] = {}
+
+    def replace_all(self, deadline_rows: list[TrackerDeadlineRow]) -> None:
+        self._deadline_by_job = {}
+        for deadline_row in deadline_rows:
+            self._store_row(deadline_row)
+        self._heap = [(due_at, job_kind, tracker_id) for (job_kind, tracker_id), due_at in self._deadline_by_job.items()]
+        heapq.heapify(self._heap)
+
+    def update(self, tracker_ids: list[int], deadline_rows: list[TrackerDeadlineRow]) -> None:
+        """Replace the deadlines of `tracker_ids`; IDs without a row (deleted, inactive) are dropped."""
+        for tracker_id in tracker_ids:
+            self._deadline_by_job.pop((DISCOVERY_JOB, tracker_id), None)
+            self._deadline_by_job.pop((SNAPSHOT_JOB, tracker_id), None)
+        for deadline_row in deadline_rows:
+            for job_key, due_at in self._store_row(deadline_row):
+                heapq.heappush(self._heap, (due_at, *job_key))
+
+    def _store_row(self, deadline_row: TrackerDeadlineRow) -> list[tuple[tuple[str, int], datetime]]:
+        tracker_id, next_discovery_at, next_snapshot_at = deadline_row
+        stored_jobs = []
+        for job_kind, due_at in ((DISCOVERY_JOB, next_discovery_at), (SNAPSHOT_JOB, next_snapshot_at)):
+            if due_at is not None:
+                self._deadline_by_job[(job_kind, tracker_id)] = due_at
+                stored_jobs.append(((job_kind, tracker_id), due_at))
+        return stored_jobs
+
+    def _is_current(self, heap_entry: tuple[datetime, str, int]) -> bool:
+        due_at, job_kind, tracker_id = heap_entry
+        return self._deadline_by_job.get((job_kind, tracker_id)) == due_at
+
+    def next_deadline(self) -> datetime | None:
+        while self._heap and not self._is_current(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due_job_kinds(self, current_time: datetime) -> set[str]:
+        """Remove every job due by `current_time` and return their kinds; the next reload re-adds leftovers."""
+        due_job_kinds: set[str] = set()
+        while self._heap and self._heap[0][0] <= current_time:
+            due_at, job_kind, tracker_id = heapq.heappop(self._heap)
+            if self._deadline_by_job.get((job_kind, tracker_id)) == due_at:
+                del self._deadline_by_job[(job_kind, tracker_id)]
+                due_job_kinds.add(job_kind)
+        return due_job_kinds
+
+def load_tracker_deadlines(database_session: Session, tracker_ids: list[int] | None = None) -> list[TrackerDeadlineRow]:
+    """(id, next_discovery_at, next_snapshot_at) of active trackers, optionally only `tracker_ids`."""
+    deadline_query = select(Tracker.id, Tracker.next_discovery_at, Tracker.next_snapshot_at).where(
+        Tracker.is_active.is_(True)
+    )
+    if tracker_ids is not None:
+        deadline_query = deadline_query.where(Tracker.id.in_(tracker_ids))
+    return [tuple(row) for row in database_session.execute(deadline_query)]  # type: ignore[misc]
+
+def load_unscheduled_trackers(database_session: Session) -> list[Tracker]:
+    """Active trackers still missing a schedule: new ones, or patched to a different snapshot interval."""
+    return list(
+        database_session.execute(
+            select(Tracker)
+            .where(Tracker.is_active.is_(True))
+            .where(or_(Tracker.next_discovery_at.is_(None), Tracker.next_snapshot_at.is_(None)))
+        ).scalars()
+    )
+
+class TrackerChangeListener:
+    """Dedicated autocommit connection LISTENing for tracker changes; reconnects lazily after errors."""
+
+    def __init__(self, database_url: str) -> None:
+        # SQLAlchemy URLs name the driver ("postgresql+psycopg"); libpq only understands "postgresql".
+        self._conninfo = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._connection: psycopg.Connection | None = None
+
+    def _connect(self) -> psycopg.Connection:
+        if self._connection is None or self._connection.closed:
+            self._connection = psycopg.connect(self._conninfo, autocommit=True)
+            self._connection.execute(f"LISTEN {TRACKER_CHANGES_CHANNEL}")
+        return self._connection
+
+    def wait(self, timeout_seconds: float) -> list[int] | None:
+        """Block until a notification or the timeout.
+
+        Returns the changed tracker IDs ([] on timeout), or None when every tracker should be
+        reloaded: an unparseable payload, or a lost connection, which may have dropped notifications.
+        """
+        try:
+            connection = self._connect()
+            notifications = list(connection.notifies(timeout=timeout_seconds, stop_after=1))
+            if notifications:
+                # A bulk change often arrives as a burst; take whatever else is queued without waiting.
+                notifications.extend(connection.notifies(timeout=0))
+        except psycopg.Error as error:
+            print(f"[worker] tracker change listener error: {error}", flush=True)
+            if self._connection is not None:
+                self._connection.close()
+            self._connection = None
+            # Degrade to plain sleeping until the next attempt to reconnect.
+            time.sleep(timeout_seconds)
+            return None
+
+        changed_tracker_ids: list[int] = []
+        for notification in notifications:
+            parsed_tracker_ids = parse_tracker_changes_payload(notification.payload)
+            if parsed_tracker_ids is None:
+                return None
+            changed_tracker_ids.extend(parsed_tracker_ids)
+        return changed_tracker_ids
@@ -1,10 +1,32 @@
-from datetime import datetime
-from sqlalchemy import distinct, select
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Iterator
+from sqlalchemy import Integer, String, case, column, func, select, values
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
-from yta_core.db.models import Tracker, TrackerCandidate, Video, VideoSnapshot
+from yta_core.db.models import (
+    SnapshotProgress,
+    Tracker,
+    TrackerCandidate,
+    Video,
+    VideoDailyStats,
+    VideoLatestStats,
+    VideoSnapshot,
+)
 from yta_core.time_utils import hour_bucket, utc_now
 from yta_core.youtube.client import YouTubeClient
+from yta_worker.services.scheduling import next_time_for_interval
+
+ROLLUP_METRICS = ("view_count", "like_count", "comment_count")
+# Candidate IDs per chunk: 20 videos.list calls.
+SNAPSHOT_CHUNK_SIZE = 1000
+
+SNAPSHOT_VIDEO_FIELDS = (
+    "items(id,snippet(title,channelId,publishedAt),contentDetails(duration),"
+    "statistics(viewCount,likeCount,commentCount))"
+)
 
 def _parse_int(value: object) -> int | None:
     try:
@@ -12,62 +34,298 @@ def _parse_int(value: object) -> int | None:
     except Exception:
         return None
 
-def snapshot_all_candidate_videos(database_session: Session, youtube_client: YouTubeClient) -> int:
-    distinct_video_ids = database_session.execute(
-        select(distinct(TrackerCandidate.video_id))
-        .join(Tracker, Tracker.id == TrackerCandidate.tracker_id)
-        .where(Tracker.is_active.is_(True))
-    ).scalars().all()
+def _parse_published_at(value: object) -> datetime | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except Exception:
+        return None
+
+def merge_daily_rollups(database_session: Session, snapshot_rows: list[dict]) -> None:
+    """Fold newly inserted snapshots into `video_daily_stats` (first/last/max per UTC day).
 
-    captured_at_bucket = hour_bucket(utc_now())
-    created_snapshots_count = 0
+    Only rows that were actually inserted should be passed, so replays never double count;
+    late, out-of-order snapshots still land in the right first/last slot.
+    """
+    daily_rows = [
+        {
+            "video_id": snapshot_row["video_id"],
+            "day": snapshot_row["captured_at"].astimezone(timezone.utc).date(),
+            "first_captured_at": snapshot_row["captured_at"],
+            "last_captured_at": snapshot_row["captured_at"],
+            **{
+                f"{metric}_{slot}": snapshot_row[metric]
+                for metric in ROLLUP_METRICS
+                for slot in ("first", "last", "max")
+            },
+        }
+        for snapshot_row in snapshot_rows
+    ]
+
+    daily_insert = insert(VideoDailyStats).values(daily_rows)
+    is_earlier = daily_insert.excluded.first_captured_at < VideoDailyStats.first_captured_at
+    is_later = daily_insert.excluded.last_captured_at > VideoDailyStats.last_captured_at
+
+    merged_columns = {
+        "first_captured_at": func.least(VideoDailyStats.first_captured_at, daily_insert.excluded.first_captured_at),
+        "last_captured_at": func.greatest(VideoDailyStats.last_captured_at, daily_insert.excluded.last_captured_at),
+    }
+    for metric in ROLLUP_METRICS:
+        first_column, last_column, max_column = f"{metric}_first", f"{metric}_last", f"{metric}_max"
+        merged_columns[first_column] = case(
+            (is_earlier, daily_insert.excluded[first_column]), else_=getattr(VideoDailyStats, first_column)
+        )
+        merged_columns[last_column] = case(
+            (is_later, daily_insert.excluded[last_column]), else_=getattr(VideoDailyStats, last_column)
+        )
+        merged_columns[max_column] = func.greatest(
+            getattr(VideoDailyStats, max_column), daily_insert.excluded[max_column]
+        )
+
+    database_session.execute(
+        daily_insert.on_conflict_do_update(
+            index_elements=[VideoDailyStats.video_id, VideoDailyStats.day],
+            set_=merged_columns,
+        )
+    )
+
+def ingest_video_details(database_session: Session, items: list[dict], captured_at_bucket: datetime) -> int:
+    """Upsert video metadata and insert one snapshot per video for the bucket.
+
+    Issues four statements per batch regardless of its size (videos, video_snapshots,
+    video_latest_stats and video_daily_stats) and returns the number of snapshots actually
+    inserted (rows already present for the bucket are skipped).
+    """
+    video_rows: dict[str, dict] = {}
+    snapshot_rows: dict[str, dict] = {}
+
+    for item in items:
+        video_id = item.get("id")
+        if not video_id:
+            continue
+
+        snippet = item.get("snippet") or {}
+        statistics = item.get("statistics") or {}
+        content_details = item.get("contentDetails") or {}
+
+        video_rows[video_id] = {
+            "video_id": video_id,
+            "title": snippet.get("title"),
+            "channel_id": snippet.get("channelId"),
+            "duration_iso": content_details.get("duration"),
+            "published_at": _parse_published_at(snippet.get("publishedAt")),
+        }
+        snapshot_rows[video_id] = {
+            "video_id": video_id,
+            "captured_at": captured_at_bucket,
+            "view_count": _parse_int(statistics.get("viewCount")),
+            "like_count": _parse_int(statistics.get("likeCount")),
+            "comment_count": _parse_int(statistics.get("commentCount")),
+        }
+
+    if not video_rows:
+        return 0
+
+    video_insert = insert(Video).values(list(video_rows.values()))
+    database_session.execute(
+        video_insert.on_conflict_do_update(
+            index_elements=[Video.video_id],
+            set_={
+                "title": video_insert.excluded.title,
+                "channel_id": video_insert.excluded.channel_id,
+                "duration_iso": video_insert.excluded.duration_iso,
+                "published_at": func.coalesce(video_insert.excluded.published_at, Video.published_at),
+            },
+        )
+    )
+
+    inserted_snapshots = database_session.execute(
+        insert(VideoSnapshot)
+        .values(list(snapshot_rows.values()))
+        .on_conflict_do_nothing(constraint="uq_video_captured")
+        .returning(
+            VideoSnapshot.video_id,
+            VideoSnapshot.captured_at,
+            VideoSnapshot.view_count,
+            VideoSnapshot.like_count,
+            VideoSnapshot.comment_count,
+        )
+    ).all()
+
+    latest_stats_insert = insert(VideoLatestStats).values(list(snapshot_rows.values()))
+    database_session.execute(
+        latest_stats_insert.on_conflict_do_update(
+            index_elements=[VideoLatestStats.video_id],
+            set_={
+                "captured_at": latest_stats_insert.excluded.captured_at,
+                "view_count": latest_stats_insert.excluded.view_count,
+                "like_count": latest_stats_insert.excluded.like_count,
+                "comment_count": latest_stats_insert.excluded.comment_count,
+            },
+            where=VideoLatestStats.captured_at <= latest_stats_insert.excluded.captured_at,
+        )
+    )
 
-    for batch_start in range(0, len(distinct_video_ids), 50):
-        batch_video_ids = distinct_video_ids[batch_start : batch_start + 50]
-        payload = youtube_client.get_videos_details(batch_video_ids)
-
-        for item in payload.get("items", []):
-            video_id = item.get("id")
-            if not video_id:
-                continue
-
-            video_row = database_session.get(Video, video_id) or Video(video_id=video_id)
-            snippet = item.get("snippet") or {}
-            statistics = item.get("statistics") or {}
-            content_details = item.get("contentDetails") or {}
-
-            video_row.title = snippet.get("title")
-            video_row.channel_id = snippet.get("channelId")
-            video_row.duration_iso = content_details.get("duration")
-
-            published_at_string = snippet.get("publishedAt")
-            if isinstance(published_at_string, str):
-                try:
-                    video_row.published_at = datetime.fromisoformat(published_at_string.replace("Z", "+00:00"))
-                except Exception:
-                    pass
-
-            database_session.add(video_row)
-
-            snapshot_exists = database_session.execute(
-                select(VideoSnapshot).where(
-                    VideoSnapshot.video_id == video_id,
-                    VideoSnapshot.captured_at == captured_at_bucket,
-                )
-            ).scalar_one_or_none()
-
-            if snapshot_exists is not None:
-                continue
-
-            database_session.add(
-                VideoSnapshot(
-                    video_id=video_id,
-                    captured_at=captured_at_bucket,
-                    view_count=_parse_int(statistics.get("viewCount")),
-                    like_count=_parse_int(statistics.get("likeCount")),
-                    comment_count=_parse_int(statistics.get("commentCount")),
-                )
+    if inserted_snapshots:
+        merge_daily_rollups(database_session, [dict(row._mapping) for row in inserted_snapshots])
+
+    return len(inserted_snapshots)
+
+def fetch_video_details_in_order(
+    youtube_client: YouTubeClient, video_id_batches: list[list[str]], max_in_flight_requests: int
+) -> Iterator[dict]:
+    """Yield videos.list payloads in batch order, keeping up to N requests in flight."""
+    if max_in_flight_requests <= 1:
+        for batch_video_ids in video_id_batches:
+            yield youtube_client.get_videos_details(batch_video_ids, fields=SNAPSHOT_VIDEO_FIELDS)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max_in_flight_requests, thread_name_prefix="videos-list")
+    pending_fetches: deque[Future[dict]] = deque()
+    try:
+        for batch_video_ids in video_id_batches:
+            pending_fetches.append(
+                executor.submit(youtube_client.get_videos_details, batch_video_ids, fields=SNAPSHOT_VIDEO_FIELDS)
+            )
+            if len(pending_fetches) >= max_in_flight_requests:
+                yield pending_fetches.popleft().result()
+
+        while pending_fetches:
+            yield pending_fetches.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def load_snapshot_cursors(
+    database_session: Session, tracker_ids: list[int], captured_at_bucket: datetime
+) -> dict[int, str]:
+    """Ledger cursor per tracker for this bucket; trackers without one start from the beginning ("")."""
+    cursor_by_tracker = {tracker_id: "" for tracker_id in tracker_ids}
+    for tracker_id, last_video_id in database_session.execute(
+        select(SnapshotProgress.tracker_id, SnapshotProgress.last_video_id)
+        .where(SnapshotProgress.tracker_id.in_(tracker_ids))
+        .where(SnapshotProgress.captured_at_bucket == captured_at_bucket)
+    ):
+        cursor_by_tracker[tracker_id] = last_video_id
+    return cursor_by_tracker
+
+def record_snapshot_progress(
+    database_session: Session, tracker_ids: list[int], captured_at_bucket: datetime, last_video_id: str
+) -> None:
+    """Advance the trackers' ledger cursors to `last_video_id` for this bucket (caller commits).
+
+    A cursor only moves forward within a bucket; a row left over from an older bucket is replaced.
+    """
+    progress_insert = insert(SnapshotProgress).values(
+        [
+            {
+                "tracker_id": tracker_id,
+                "captured_at_bucket": captured_at_bucket,
+                "last_video_id": last_video_id,
+                "updated_at": utc_now(),
+            }
+            for tracker_id in tracker_ids
+        ]
+    )
+    same_bucket = SnapshotProgress.captured_at_bucket == progress_insert.excluded.captured_at_bucket
+    database_session.execute(
+        progress_insert.on_conflict_do_update(
+            index_elements=[SnapshotProgress.tracker_id],
+            set_={
+                "captured_at_bucket": progress_insert.excluded.captured_at_bucket,
+                "last_video_id": case(
+                    (same_bucket, func.greatest(SnapshotProgress.last_video_id, progress_insert.excluded.last_video_id)),
+                    else_=progress_insert.excluded.last_video_id,
+                ),
+                "updated_at": progress_insert.excluded.updated_at,
+            },
+        )
+    )
+
+def iter_due_video_id_chunks(
+    database_session: Session, cursor_by_tracker: dict[int, str], captured_at_bucket: datetime, chunk_size: int
+) -> Iterator[list[str]]:
+    """Distinct candidate IDs past each tracker's cursor and not yet captured, in `video_id` order.
+
+    Keyset-paginated, so only one chunk of IDs is held at a time and each page is a fresh query
+    that sees snapshots committed by earlier chunks.
+    """
+    tracker_cursors = values(
+        column("tracker_id", Integer), column("after_video_id", String), name="tracker_cursors"
+    ).data(list(cursor_by_tracker.items()))
+    already_captured = select(VideoSnapshot.id).where(
+        VideoSnapshot.video_id == TrackerCandidate.video_id,
+        VideoSnapshot.captured_at == captured_at_bucket,
+    )
+    due_video_ids = (
+        select(TrackerCandidate.video_id)
+        .join(tracker_cursors, tracker_cursors.c.tracker_id == TrackerCandidate.tracker_id)
+        .where(TrackerCandidate.video_id > tracker_cursors.c.after_video_id)
+        .where(~already_captured.exists())
+        .distinct()
+        .order_by(TrackerCandidate.video_id)
+        .limit(chunk_size)
+    )
+
+    last_video_id = ""
+    while True:
+        chunk_video_ids = list(
+            database_session.execute(due_video_ids.where(TrackerCandidate.video_id > last_video_id)).scalars()
+        )
+        if not chunk_video_ids:
+            return
+        yield chunk_video_ids
+        last_video_id = chunk_video_ids[-1]
+
+def snapshot_tracker_videos(
+    database_session: Session,
+    youtube_client: YouTubeClient,
+    due_trackers: list[Tracker],
+    max_in_flight_requests: int = 1,
+    min_interval_minutes: int = 60,
+    chunk_size: int = SNAPSHOT_CHUNK_SIZE,
+    checkpoint: Callable[[], None] | None = None,
+) -> int:
+    """Snapshot the candidates of the given due trackers, then advance their `next_snapshot_at`.
+
+    A video shared by several trackers is fetched once per bucket whenever any of them is due,
+    so it is effectively sampled at the tightest cadence among its trackers.
+
+    Candidates are processed `chunk_size` at a time; after each chunk the ledger cursor is
+    advanced and `checkpoint` runs (the stage commits there), so a failed or killed tick keeps
+    its finished chunks and a rerun within the same bucket resumes after the last one.
+    """
+    if not due_trackers:
+        return 0
+
+    current_time = utc_now()
+    captured_at_bucket = hour_bucket(current_time)
+    due_tracker_ids = [tracker.id for tracker in due_trackers]
+    cursor_by_tracker = load_snapshot_cursors(database_session, due_tracker_ids, captured_at_bucket)
+
+    created_snapshots_count = 0
+    for chunk_video_ids in iter_due_video_id_chunks(
+        database_session, cursor_by_tracker, captured_at_bucket, chunk_size
+    ):
+        video_id_batches = [
+            chunk_video_ids[batch_start : batch_start + 50] for batch_start in range(0, len(chunk_video_ids), 50)
+        ]
+        for payload in fetch_video_details_in_order(youtube_client, video_id_batches, max_in_flight_requests):
+            created_snapshots_count += ingest_video_details(
+                database_session, payload.get("items", []), captured_at_bucket
             )
-            created_snapshots_count += 1
+
+        record_snapshot_progress(database_session, due_tracker_ids, captured_at_bucket, chunk_video_ids[-1])
+        if checkpoint is not None:
+            checkpoint()
+
+    # Checkpoint commits expired the trackers; reload them in one query instead of one per tracker.
+    database_session.execute(
+        select(Tracker).where(Tracker.id.in_(due_tracker_ids)).execution_options(populate_existing=True)
+    )
+    for tracker in due_trackers:
+        interval_minutes = max(tracker.snapshot_interval_hours * 60, min_interval_minutes)
+        tracker.next_snapshot_at = next_time_for_interval(current_time, interval_minutes)
+        database_session.add(tracker)
 
     return created_snapshots_count
@@ -1,15 +1,58 @@
-import time
-from sqlalchemy import select
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
+from yta_core.cold_storage import compact_oldest_cold_day, delete_expired_snapshot_blocks
+from yta_core.db.partitions import apply_snapshot_retention, ensure_snapshot_partitions, snapshot_retention_cutoff
 from yta_core.db.session import SessionFactory
-from yta_core.db.models import Tracker, TrackerType, VideoSnapshot
+from yta_core.db.models import Tracker, TrackerType
+from yta_core.ranking import refresh_tracker_leaderboards
 from yta_core.time_utils import hour_bucket, utc_now
 from yta_core.youtube.client import YouTubeClient
+from yta_core.youtube.quota import QuotaTracker, next_quota_reset, quota_day, units_used_on
 from yta_worker.settings import WorkerSettings
-from yta_worker.services.discovery import run_tracker_discovery
-from yta_worker.services.scheduling import is_due, next_time_for_interval, stagger_daily_discovery
-from yta_worker.services.snapshots import snapshot_all_candidate_videos
+from yta_worker.services.budget import (
+    plan_discovery_within_budget,
+    plan_snapshots_within_budget,
+    projected_snapshot_units,
+)
+from yta_worker.services.channel_metadata import refresh_channel_metadata_batch
+from yta_worker.services.discovery import (
+    DiscoveryGroup,
+    apply_group_discovery,
+    discover_candidate_ids,
+    fresh_source_results,
+    group_trackers_by_source,
+    load_cached_sources,
+    prime_groups_from_cache,
+    source_freshness_cutoffs,
+    store_source_results,
+)
+from yta_worker.services.leases import (
+    DISCOVERY_JOB,
+    SNAPSHOT_JOB,
+    claim_due_trackers,
+    extend_tracker_leases,
+    make_worker_identity,
+    release_tracker_leases,
+)
+from yta_worker.services.scheduler import (
+    TrackerChangeListener,
+    TrackerDeadlineQueue,
+    load_tracker_deadlines,
+    load_unscheduled_trackers,
+)
+from yta_worker.services.scheduling import next_time_for_interval, stagger_daily_discovery
+from yta_worker.services.snapshots import snapshot_tracker_videos
+
+COMPACTION_BATCHES_PER_TICK = 20
+# Keeps concurrent workers from compacting (and re-encoding) the same video-days.
+COMPACTION_LOCK_KEY = 7_151_018
+# Keeps concurrent workers from fetching the same due channels twice.
+CHANNEL_METADATA_LOCK_KEY = 7_151_023
+# Partition upkeep, channel metadata refresh and compaction each run on startup and then this often.
+HOUSEKEEPING_INTERVAL = timedelta(hours=1)
 
 def ensure_tracker_schedule_fields(database_session: Session, tracker: Tracker) -> None:
     current_time = utc_now()
@@ -24,56 +67,374 @@ def ensure_tracker_schedule_fields(database_session: Session, tracker: Tracker)
 
     database_session.add(tracker)
 
-def should_run_hourly_snapshot(database_session: Session) -> bool:
-    current_bucket = hour_bucket(utc_now())
-    latest_snapshot_time = database_session.execute(
-        select(VideoSnapshot.captured_at).order_by(VideoSnapshot.captured_at.desc()).limit(1)
-    ).scalar_one_or_none()
-    return latest_snapshot_time is None or latest_snapshot_time < current_bucket
+def remaining_quota_units(
+    database_session: Session, worker_settings: WorkerSettings, quota_tracker: QuotaTracker, current_time: datetime
+) -> int:
+    """Today's quota left after committed usage and usage not yet committed by this worker."""
+    return (
+        worker_settings.youtube_daily_quota_units
+        - units_used_on(database_session, quota_day(current_time))
+        - quota_tracker.pending_units()
+    )
 
-def run_worker_loop(worker_settings: WorkerSettings) -> None:
-    youtube_client = YouTubeClient(worker_settings.youtube_api_key)
+def run_discovery_for_trackers(
+    database_session: Session,
+    worker_settings: WorkerSettings,
+    quota_tracker: QuotaTracker,
+    due_trackers: list[Tracker],
+) -> None:
+    current_time = utc_now()
+    groups, sourceless_trackers = group_trackers_by_source(due_trackers)
 
-    while True:
-        try:
-            with SessionFactory() as database_session:
-                active_trackers = database_session.execute(
-                    select(Tracker).where(Tracker.is_active.is_(True))
-                ).scalars().all()
+    cached_sources = load_cached_sources(database_session, groups)
+    cached_candidate_ids = fresh_source_results(
+        groups,
+        cached_sources,
+        source_freshness_cutoffs(
+            current_time,
+            worker_settings.channel_discovery_interval_minutes,
+            worker_settings.search_discovery_interval_minutes,
+        ),
+    )
+    groups_to_fetch = [group for group in groups if group.source_key not in cached_candidate_ids]
+    prime_groups_from_cache(groups_to_fetch, cached_sources)
+
+    remaining_units = remaining_quota_units(database_session, worker_settings, quota_tracker, current_time)
+    reserved_units = projected_snapshot_units(
+        database_session, current_time, worker_settings.snapshot_interval_minutes
+    )
+    groups_to_fetch, deferred_groups = plan_discovery_within_budget(
+        groups_to_fetch,
+        remaining_units,
+        reserved_units,
+        current_time,
+        {
+            TrackerType.channel: worker_settings.channel_discovery_interval_minutes,
+            TrackerType.search: worker_settings.search_discovery_interval_minutes,
+        },
+    )
+
+    for group in deferred_groups:
+        for tracker in group.trackers:
+            tracker.next_discovery_at = next_quota_reset(current_time)
+            database_session.add(tracker)
+        print(f"[worker] deferring discovery for {group.source_key} until quota reset", flush=True)
+
+    discovered_candidate_ids = (
+        asyncio.run(
+            discover_candidate_ids(
+                worker_settings.youtube_api_key,
+                groups_to_fetch,
+                worker_settings.discovery_max_concurrency,
+                quota_tracker,
+            )
+        )
+        if groups_to_fetch
+        else {}
+    )
+
+    fetched_groups: dict[str, tuple[DiscoveryGroup, list[str]]] = {}
+    completed_trackers: list[Tracker] = list(sourceless_trackers)
+
+    for group in groups_to_fetch:
+        candidate_video_ids = discovered_candidate_ids[group.source_key]
+        if isinstance(candidate_video_ids, BaseException):
+            print(f"[worker] discovery error for {group.source_key}: {candidate_video_ids}", flush=True)
+            # Retry after one poll interval rather than immediately re-claiming it in this stage.
+            for tracker in group.trackers:
+                tracker.next_discovery_at = current_time + timedelta(seconds=worker_settings.poll_interval_seconds)
+                database_session.add(tracker)
+            continue
+
+        if candidate_video_ids is not None:
+            fetched_groups[group.source_key] = (group, candidate_video_ids)
+        apply_group_discovery(database_session, group, candidate_video_ids)
+        completed_trackers.extend(group.trackers)
+
+    for group in groups:
+        if group.source_key in cached_candidate_ids:
+            apply_group_discovery(database_session, group, cached_candidate_ids[group.source_key])
+            completed_trackers.extend(group.trackers)
 
-                for tracker in active_trackers:
-                    ensure_tracker_schedule_fields(database_session, tracker)
+    store_source_results(database_session, fetched_groups, current_time)
 
+    for tracker in completed_trackers:
+        interval_minutes = (
+            worker_settings.search_discovery_interval_minutes
+            if tracker.type == TrackerType.search
+            else worker_settings.channel_discovery_interval_minutes
+        )
+        tracker.next_discovery_at = next_time_for_interval(current_time, interval_minutes)
+        database_session.add(tracker)
+
+def run_discovery_stage(worker_settings: WorkerSettings, quota_tracker: QuotaTracker, worker_identity: str) -> None:
+    """Lease and discover due trackers batch by batch until none are left for this worker."""
+    while True:
+        with SessionFactory() as database_session:
+            claimed_trackers = claim_due_trackers(
+                database_session,
+                DISCOVERY_JOB,
+                Tracker.next_discovery_at,
+                worker_identity,
+                worker_settings.lease_seconds,
+                worker_settings.discovery_claim_batch_size,
+            )
+            if not claimed_trackers:
+                return
+
+            claimed_tracker_ids = [tracker.id for tracker in claimed_trackers]
+            try:
+                run_discovery_for_trackers(database_session, worker_settings, quota_tracker, claimed_trackers)
+                release_tracker_leases(database_session, DISCOVERY_JOB, claimed_tracker_ids, worker_identity)
+                quota_tracker.flush(database_session)
                 database_session.commit()
+            except Exception:
+                database_session.rollback()
+                release_tracker_leases(database_session, DISCOVERY_JOB, claimed_tracker_ids, worker_identity)
+                database_session.commit()
+                raise
 
-            with SessionFactory() as database_session:
-                current_time = utc_now()
-                active_trackers = database_session.execute(
-                    select(Tracker).where(Tracker.is_active.is_(True))
-                ).scalars().all()
+def defer_snapshots_over_budget(
+    database_session: Session, worker_settings: WorkerSettings, quota_tracker: QuotaTracker, trackers: list[Tracker]
+) -> list[Tracker]:
+    """The trackers to snapshot now; the rest wait for the quota reset, lowest value per unit first."""
+    current_time = utc_now()
+    remaining_units = remaining_quota_units(database_session, worker_settings, quota_tracker, current_time)
+    approved_trackers, deferred_trackers = plan_snapshots_within_budget(
+        database_session, trackers, remaining_units, current_time, worker_settings.snapshot_interval_minutes
+    )
+    for tracker in deferred_trackers:
+        tracker.next_snapshot_at = next_quota_reset(current_time)
+        database_session.add(tracker)
+    if deferred_trackers:
+        print(f"[worker] deferring snapshots for {len(deferred_trackers)} trackers until quota reset", flush=True)
+    return approved_trackers
 
-                for tracker in active_trackers:
-                    if not is_due(current_time, tracker.next_discovery_at):
-                        continue
+def run_snapshot_stage(
+    worker_settings: WorkerSettings, youtube_client: YouTubeClient, quota_tracker: QuotaTracker, worker_identity: str
+) -> None:
+    """Lease and snapshot due trackers batch by batch until none are left for this worker.
 
-                    run_tracker_discovery(database_session, youtube_client, tracker)
+    Trackers the remaining daily quota cannot cover are deferred to the reset. Each candidate
+    chunk is committed as it finishes (renewing the leases), so an error only rolls back the
+    chunk in progress; the released trackers resume from their ledger cursor.
+    """
+    while True:
+        with SessionFactory() as database_session:
+            claimed_trackers = claim_due_trackers(
+                database_session,
+                SNAPSHOT_JOB,
+                Tracker.next_snapshot_at,
+                worker_identity,
+                worker_settings.lease_seconds,
+                worker_settings.snapshot_claim_batch_size,
+            )
+            if not claimed_trackers:
+                return
 
-                    interval_minutes = (
-                        worker_settings.search_discovery_interval_minutes
-                        if tracker.type == TrackerType.search
-                        else worker_settings.channel_discovery_interval_minutes
-                    )
-                    tracker.next_discovery_at = next_time_for_interval(current_time, interval_minutes)
-                    database_session.add(tracker)
+            claimed_tracker_ids = [tracker.id for tracker in claimed_trackers]
 
+            def checkpoint_snapshot_chunk() -> None:
+                extend_tracker_leases(
+                    database_session, SNAPSHOT_JOB, claimed_tracker_ids, worker_identity, worker_settings.lease_seconds
+                )
+                quota_tracker.flush(database_session)
                 database_session.commit()
 
-            with SessionFactory() as database_session:
-                if should_run_hourly_snapshot(database_session):
-                    snapshot_all_candidate_videos(database_session, youtube_client)
-                    database_session.commit()
+            try:
+                budgeted_trackers = defer_snapshots_over_budget(
+                    database_session, worker_settings, quota_tracker, claimed_trackers
+                )
+                snapshot_tracker_videos(
+                    database_session,
+                    youtube_client,
+                    budgeted_trackers,
+                    worker_settings.snapshot_max_in_flight_requests,
+                    worker_settings.snapshot_interval_minutes,
+                    worker_settings.snapshot_commit_chunk_size,
+                    checkpoint_snapshot_chunk,
+                )
+                refresh_tracker_leaderboards(database_session, budgeted_trackers)
+                release_tracker_leases(database_session, SNAPSHOT_JOB, claimed_tracker_ids, worker_identity)
+                quota_tracker.flush(database_session)
+                database_session.commit()
+            except Exception:
+                database_session.rollback()
+                release_tracker_leases(database_session, SNAPSHOT_JOB, claimed_tracker_ids, worker_identity)
+                database_session.commit()
+                raise
+
+def maintain_snapshot_partitions(worker_settings: WorkerSettings) -> None:
+    """Keep monthly video_snapshots partitions ahead of time and expire the oldest ones."""
+    current_time = utc_now()
+    with SessionFactory() as database_session:
+        created_partitions = ensure_snapshot_partitions(
+            database_session, current_time, worker_settings.snapshot_partition_months_ahead
+        )
+        expired_partitions = apply_snapshot_retention(
+            database_session,
+            current_time,
+            worker_settings.snapshot_retention_months,
+            worker_settings.snapshot_retention_action,
+        )
+        # Compaction has already moved older rows out of the partitions, so expire their blocks too.
+        retention_cutoff = snapshot_retention_cutoff(current_time, worker_settings.snapshot_retention_months)
+        expired_blocks_count = (
+            delete_expired_snapshot_blocks(database_session, retention_cutoff) if retention_cutoff is not None else 0
+        )
+        database_session.commit()
+
+    if created_partitions:
+        print(f"[worker] created snapshot partitions {created_partitions}", flush=True)
+    if expired_partitions:
+        print(
+            f"[worker] {worker_settings.snapshot_retention_action} expired snapshot partitions {expired_partitions}",
+            flush=True,
+        )
+    if expired_blocks_count:
+        print(f"[worker] deleted {expired_blocks_count} expired cold snapshot blocks", flush=True)
+
+def run_compaction_stage(worker_settings: WorkerSettings) -> None:
+    """Compact raw snapshots past the cold threshold, a bounded number of batches per tick."""
+    if worker_settings.snapshot_compaction_after_days <= 0:
+        return
+
+    cutoff_time = utc_now() - timedelta(days=worker_settings.snapshot_compaction_after_days)
+    compacted_rows_count = 0
+    for _ in range(COMPACTION_BATCHES_PER_TICK):
+        with SessionFactory() as database_session:
+            database_session.execute(select(func.pg_advisory_xact_lock(COMPACTION_LOCK_KEY)))
+            batch_rows_count = compact_oldest_cold_day(
+                database_session, cutoff_time, worker_settings.snapshot_compaction_batch_size
+            )
+            database_session.commit()
+        if batch_rows_count == 0:
+            break
+        compacted_rows_count += batch_rows_count
+
+    if compacted_rows_count:
+        print(f"[worker] compacted {compacted_rows_count} snapshots into cold blocks", flush=True)
+
+def run_channel_metadata_stage(
+    worker_settings: WorkerSettings, youtube_client: YouTubeClient, quota_tracker: QuotaTracker
+) -> None:
+    """Refresh stored metadata for tracked channels that are new or due, one 50-ID call per batch."""
+    refresh_interval = timedelta(hours=worker_settings.channel_metadata_refresh_hours)
+    refreshed_channels_count = 0
+    for _ in range(worker_settings.channel_metadata_batches_per_tick):
+        with SessionFactory() as database_session:
+            database_session.execute(select(func.pg_advisory_xact_lock(CHANNEL_METADATA_LOCK_KEY)))
+            batch_channels_count = refresh_channel_metadata_batch(database_session, youtube_client, refresh_interval)
+            quota_tracker.flush(database_session)
+            database_session.commit()
+        if batch_channels_count == 0:
+            break
+        refreshed_channels_count += batch_channels_count
+
+    if refreshed_channels_count:
+        print(f"[worker] refreshed metadata for {refreshed_channels_count} channels", flush=True)
+
+def refresh_tracker_deadlines(deadline_queue: TrackerDeadlineQueue, tracker_ids: list[int] | None) -> None:
+    """Schedule unscheduled trackers, then reload deadlines for `tracker_ids` (None reloads all)."""
+    with SessionFactory() as database_session:
+        for tracker in load_unscheduled_trackers(database_session):
+            ensure_tracker_schedule_fields(database_session, tracker)
+        database_session.commit()
+
+        deadline_rows = load_tracker_deadlines(database_session, tracker_ids)
+
+    if tracker_ids is None:
+        deadline_queue.replace_all(deadline_rows)
+    else:
+        deadline_queue.update(tracker_ids, deadline_rows)
+
+def run_housekeeping(
+    worker_settings: WorkerSettings, youtube_client: YouTubeClient, quota_tracker: QuotaTracker
+) -> None:
+    run_channel_metadata_stage(worker_settings, youtube_client, quota_tracker)
+    run_compaction_stage(worker_settings)
+
+def run_worker_loop(worker_settings: WorkerSettings) -> None:
+    """Sleep until the earliest tracker deadline or housekeeping, waking early when the API changes trackers.
+
+    Deadlines are reloaded after this worker runs a stage, for the trackers named in a notification,
+    and in full every `scheduler_max_sleep_seconds` to pick up other workers' schedule changes.
+    """
+    worker_identity = make_worker_identity()
+    quota_tracker = QuotaTracker()
+    youtube_client = YouTubeClient(
+        worker_settings.youtube_api_key,
+        pool_size=max(worker_settings.youtube_http_pool_size, worker_settings.snapshot_max_in_flight_requests),
+        quota_tracker=quota_tracker,
+    )
+    deadline_queue = TrackerDeadlineQueue()
+    change_listener = TrackerChangeListener(str(worker_settings.database_url))
+    full_reload_interval = timedelta(seconds=worker_settings.scheduler_max_sleep_seconds)
+    print(f"[worker] identity {worker_identity}", flush=True)
+
+    changed_tracker_ids: list[int] | None = None
+    next_full_reload_at = utc_now()
+    next_partition_upkeep_at = utc_now()
+    next_housekeeping_at = utc_now()
+
+    while True:
+        retry_backoff = False
+
+        # Ahead of and apart from the tracker stages: snapshot inserts fail without a partition,
+        # so a failing stage must not be able to hold partition creation back.
+        if utc_now() >= next_partition_upkeep_at:
+            try:
+                maintain_snapshot_partitions(worker_settings)
+                next_partition_upkeep_at = utc_now() + HOUSEKEEPING_INTERVAL
+            except Exception as error:
+                print(f"[worker] partition upkeep error: {error}", flush=True)
+                retry_backoff = True
+
+        try:
+            if changed_tracker_ids is None or utc_now() >= next_full_reload_at:
+                refresh_tracker_deadlines(deadline_queue, None)
+                next_full_reload_at = utc_now() + full_reload_interval
+            elif changed_tracker_ids:
+                refresh_tracker_deadlines(deadline_queue, changed_tracker_ids)
+            changed_tracker_ids = []
+
+            due_job_kinds = deadline_queue.pop_due_job_kinds(utc_now())
+            if DISCOVERY_JOB in due_job_kinds:
+                run_discovery_stage(worker_settings, quota_tracker, worker_identity)
+            if SNAPSHOT_JOB in due_job_kinds:
+                run_snapshot_stage(worker_settings, youtube_client, quota_tracker, worker_identity)
+                # New candidate videos bring channels whose metadata is not stored yet.
+                run_channel_metadata_stage(worker_settings, youtube_client, quota_tracker)
+
+            if due_job_kinds:
+                refresh_tracker_deadlines(deadline_queue, None)
+                next_full_reload_at = utc_now() + full_reload_interval
+                # Still overdue after running the stages: leased by another worker, or just failed.
+                next_deadline = deadline_queue.next_deadline()
+                retry_backoff = retry_backoff or (next_deadline is not None and next_deadline <= utc_now())
 
         except Exception as error:
             print(f"[worker] tick error: {error}", flush=True)
+            changed_tracker_ids = None
+            retry_backoff = True
+
+        if utc_now() >= next_housekeeping_at:
+            try:
+                run_housekeeping(worker_settings, youtube_client, quota_tracker)
+            except Exception as error:
+                print(f"[worker] housekeeping error: {error}", flush=True)
+            next_housekeeping_at = utc_now() + HOUSEKEEPING_INTERVAL
+
+        wake_at = min(next_full_reload_at, next_partition_upkeep_at, next_housekeeping_at)
+        next_deadline = deadline_queue.next_deadline()
+        if next_deadline is not None:
+            wake_at = min(wake_at, next_deadline)
+        sleep_seconds = max((wake_at - utc_now()).total_seconds(), 0.0)
+        if retry_backoff:
+            sleep_seconds = max(sleep_seconds, worker_settings.poll_interval_seconds)
 
-        time.sleep(worker_settings.poll_interval_seconds)
+        notified_tracker_ids = change_listener.wait(sleep_seconds)
+        if notified_tracker_ids is None or changed_tracker_ids is None:
+            changed_tracker_ids = None
+        else:
+            changed_tracker_ids.extend(notified_tracker_ids)
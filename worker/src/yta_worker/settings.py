@@ -1,12 +1,38 @@
 from pydantic import Field
+from yta_core.db.partitions import RetentionAction
 from pydantic_settings import SettingsConfigDict
 from yta_core.settings import CoreSettings
 
 class WorkerSettings(CoreSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
-    snapshot_interval_minutes: int = Field(default=60, alias="SNAPSHOT_INTERVAL_MINUTES")
     channel_discovery_interval_minutes: int = Field(default=60, alias="CHANNEL_DISCOVERY_INTERVAL_MINUTES")
     search_discovery_interval_minutes: int = Field(default=1440, alias="SEARCH_DISCOVERY_INTERVAL_MINUTES")
+    youtube_daily_quota_units: int = Field(default=10000, alias="YOUTUBE_DAILY_QUOTA_UNITS")
+    discovery_max_concurrency: int = Field(default=8, ge=1, alias="DISCOVERY_MAX_CONCURRENCY")
+    snapshot_max_in_flight_requests: int = Field(default=4, ge=1, alias="SNAPSHOT_MAX_IN_FLIGHT_REQUESTS")
 
+    lease_seconds: int = Field(default=900, ge=30, alias="WORKER_LEASE_SECONDS")
+    discovery_claim_batch_size: int = Field(default=50, ge=1, alias="DISCOVERY_CLAIM_BATCH_SIZE")
+    snapshot_claim_batch_size: int = Field(default=200, ge=1, alias="SNAPSHOT_CLAIM_BATCH_SIZE")
+    # Candidate videos snapshotted per committed chunk; also the unit a crashed tick can lose.
+    snapshot_commit_chunk_size: int = Field(default=1000, ge=50, alias="SNAPSHOT_COMMIT_CHUNK_SIZE")
+
+    snapshot_partition_months_ahead: int = Field(default=2, ge=1, alias="SNAPSHOT_PARTITION_MONTHS_AHEAD")
+    # 0 keeps every month; "detach" leaves expired partitions as standalone tables for archiving.
+    # Cold blocks of expired months are deleted either way.
+    snapshot_retention_months: int = Field(default=0, ge=0, alias="SNAPSHOT_RETENTION_MONTHS")
+    snapshot_retention_action: RetentionAction = Field(default="detach", alias="SNAPSHOT_RETENTION_ACTION")
+
+    snapshot_compaction_batch_size: int = Field(default=500, ge=1, alias="SNAPSHOT_COMPACTION_BATCH_SIZE")
+
+    # Channels of tracked videos are refetched (50 per channels.list call) this long after their last fetch.
+    channel_metadata_refresh_hours: int = Field(default=24, ge=1, alias="CHANNEL_METADATA_REFRESH_HOURS")
+    channel_metadata_batches_per_tick: int = Field(default=20, ge=1, alias="CHANNEL_METADATA_BATCHES_PER_TICK")
+
+    # Every deadline is reloaded from the database at least this often, picking up schedule changes
+    # made by other workers, which send no notifications.
+    scheduler_max_sleep_seconds: int = Field(default=900, ge=1, alias="SCHEDULER_MAX_SLEEP_SECONDS")
+
+    # Backoff before retrying overdue work (leased elsewhere or failed) and failed discovery sources.
     poll_interval_seconds: int = 30
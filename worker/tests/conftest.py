@@ -0,0 +1,47 @@
+"""Shared fixtures for the worker tests.
+
+Database-backed tests run against YTA_TEST_DATABASE_URL, which must point at a disposable
+database migrated to head (`alembic upgrade head`); they truncate the tables they use and are
+skipped when the variable is unset.
+"""
+import os
+from datetime import timedelta
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+TEST_DATABASE_URL = os.environ.get("YTA_TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # yta_core.db.session builds its engine from DATABASE_URL on import, in spawned workers too.
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+@pytest.fixture
+def session_factory() -> sessionmaker:
+    if not TEST_DATABASE_URL:
+        pytest.skip("YTA_TEST_DATABASE_URL is not set")
+    from yta_core.db.session import SessionFactory
+
+    return SessionFactory
+
+@pytest.fixture
+def due_tracker_ids(session_factory: sessionmaker) -> list[int]:
+    """300 active channel trackers, all due for discovery and snapshots, with no leases."""
+    from yta_core.time_utils import utc_now
+
+    with session_factory() as database_session:
+        database_session.execute(text("TRUNCATE users, trackers, work_leases RESTART IDENTITY CASCADE"))
+        database_session.execute(text("INSERT INTO users (email) VALUES ('worker-tests@example.com')"))
+        tracker_ids = list(
+            database_session.execute(
+                text(
+                    "INSERT INTO trackers (owner_user_id, type, channel_id, top_n, candidate_pool_size, "
+                    "ranking_metric, discovery_interval_hours, snapshot_interval_hours, is_active, "
+                    "next_discovery_at, next_snapshot_at) "
+                    "SELECT 1, 'channel', 'UC' || tracker_index, 10, 100, 'views', 1, 1, true, :due_at, :due_at "
+                    "FROM generate_series(1, 300) AS tracker_index RETURNING id"
+                ),
+                {"due_at": utc_now() - timedelta(minutes=1)},
+            ).scalars()
+        )
+        database_session.commit()
+    return sorted(tracker_ids)
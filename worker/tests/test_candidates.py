@@ -0,0 +1,51 @@
+from sqlalchemy import event, func, select, text
+from sqlalchemy.orm import sessionmaker
+
+from yta_core.db.models import Tracker, TrackerCandidate
+from yta_worker.services.candidates import upsert_tracker_candidates
+
+def count_statements(session_factory: sessionmaker, tracker_id: int, candidate_video_ids: list[str]) -> int:
+    """Statements sent to Postgres by one upsert, excluding the tracker load."""
+    executed_statements: list[str] = []
+
+    def record_statement(connection, cursor, statement, parameters, context, executemany) -> None:
+        executed_statements.append(statement)
+
+    with session_factory() as database_session:
+        tracker = database_session.get(Tracker, tracker_id)
+        assert tracker is not None
+        database_engine = database_session.get_bind()
+        event.listen(database_engine, "before_cursor_execute", record_statement)
+        try:
+            upsert_tracker_candidates(database_session, tracker, candidate_video_ids)
+            database_session.commit()
+        finally:
+            event.remove(database_engine, "before_cursor_execute", record_statement)
+    return len(executed_statements)
+
+def test_round_trips_do_not_grow_with_pool_size(session_factory: sessionmaker, due_tracker_ids: list[int]) -> None:
+    small_tracker_id, large_tracker_id = due_tracker_ids[:2]
+    with session_factory() as database_session:
+        database_session.execute(text("TRUNCATE videos CASCADE"))
+        database_session.commit()
+
+    small_pool_video_ids = [f"small-{index}" for index in range(10)]
+    large_pool_video_ids = [f"large-{index}" for index in range(1_000)]
+    small_pool_statements = count_statements(session_factory, small_tracker_id, small_pool_video_ids)
+    large_pool_statements = count_statements(session_factory, large_tracker_id, large_pool_video_ids)
+    assert large_pool_statements == small_pool_statements
+
+def test_candidates_beyond_pool_size_are_pruned(session_factory: sessionmaker, due_tracker_ids: list[int]) -> None:
+    tracker_id = due_tracker_ids[0]
+    # The fixture's trackers keep 100 candidates; the first-ranked ones of the newest fetch win.
+    count_statements(session_factory, tracker_id, [f"old-{index}" for index in range(80)])
+    count_statements(session_factory, tracker_id, [f"new-{index}" for index in range(60)] + ["new-0"])
+
+    with session_factory() as database_session:
+        kept_video_ids = set(
+            database_session.execute(
+                select(TrackerCandidate.video_id).where(TrackerCandidate.tracker_id == tracker_id)
+            ).scalars()
+        )
+        assert database_session.execute(select(func.count()).select_from(TrackerCandidate)).scalar_one() == 100
+    assert {f"new-{index}" for index in range(60)} <= kept_video_ids
@@ -0,0 +1,133 @@
+import multiprocessing
+import time
+from datetime import timedelta
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.orm import sessionmaker
+
+from yta_core.db.models import Tracker, WorkLease
+from yta_core.time_utils import utc_now
+from yta_worker.services.leases import (
+    DISCOVERY_JOB,
+    SNAPSHOT_JOB,
+    claim_due_trackers,
+    extend_tracker_leases,
+    make_worker_identity,
+    release_tracker_leases,
+)
+
+WORKER_PROCESS_COUNT = 4
+CLAIM_BATCH_SIZE = 10
+LEASE_SECONDS = 60
+DUE_COLUMN_BY_JOB = {DISCOVERY_JOB: Tracker.next_discovery_at, SNAPSHOT_JOB: Tracker.next_snapshot_at}
+
+def claim(
+    session_factory: sessionmaker, worker_identity: str, limit: int = CLAIM_BATCH_SIZE, job_kind: str = DISCOVERY_JOB
+) -> list[int]:
+    with session_factory() as database_session:
+        claimed_trackers = claim_due_trackers(
+            database_session, job_kind, DUE_COLUMN_BY_JOB[job_kind], worker_identity, LEASE_SECONDS, limit
+        )
+        return [tracker.id for tracker in claimed_trackers]
+
+def expire_all_leases(session_factory: sessionmaker) -> None:
+    with session_factory() as database_session:
+        database_session.execute(update(WorkLease).values(expires_at=utc_now() - timedelta(seconds=1)))
+        database_session.commit()
+
+def run_discovery_worker(start_barrier) -> list[int]:
+    """One worker process: claim a batch, "discover" it, push its deadline out and release, until none are due."""
+    from yta_core.db.session import SessionFactory
+
+    worker_identity = make_worker_identity()
+    processed_tracker_ids: list[int] = []
+    start_barrier.wait()
+    while True:
+        with SessionFactory() as database_session:
+            claimed_trackers = claim_due_trackers(
+                database_session,
+                DISCOVERY_JOB,
+                Tracker.next_discovery_at,
+                worker_identity,
+                LEASE_SECONDS,
+                CLAIM_BATCH_SIZE,
+            )
+            if not claimed_trackers:
+                return processed_tracker_ids
+
+            time.sleep(0.01)
+            for tracker in claimed_trackers:
+                tracker.next_discovery_at = utc_now() + timedelta(hours=1)
+            claimed_tracker_ids = [tracker.id for tracker in claimed_trackers]
+            release_tracker_leases(database_session, DISCOVERY_JOB, claimed_tracker_ids, worker_identity)
+            database_session.commit()
+            processed_tracker_ids.extend(claimed_tracker_ids)
+
+def test_worker_processes_split_due_trackers_without_duplicates(due_tracker_ids: list[int]) -> None:
+    process_context = multiprocessing.get_context("spawn")
+    with process_context.Manager() as process_manager, process_context.Pool(WORKER_PROCESS_COUNT) as worker_pool:
+        start_barrier = process_manager.Barrier(WORKER_PROCESS_COUNT)
+        processed_by_worker = worker_pool.map(run_discovery_worker, [start_barrier] * WORKER_PROCESS_COUNT)
+
+    processed_tracker_ids = [
+        tracker_id for worker_tracker_ids in processed_by_worker for tracker_id in worker_tracker_ids
+    ]
+    assert sorted(processed_tracker_ids) == due_tracker_ids
+    assert sum(1 for worker_tracker_ids in processed_by_worker if worker_tracker_ids) > 1
+
+def test_live_lease_blocks_other_workers_until_released(
+    session_factory: sessionmaker, due_tracker_ids: list[int]
+) -> None:
+    first_worker, second_worker = make_worker_identity(), make_worker_identity()
+    first_claim = claim(session_factory, first_worker)
+    assert first_claim == due_tracker_ids[:CLAIM_BATCH_SIZE]
+    # Still due, but leased: the second worker gets the next batch instead.
+    assert claim(session_factory, second_worker) == due_tracker_ids[CLAIM_BATCH_SIZE : 2 * CLAIM_BATCH_SIZE]
+
+    with session_factory() as database_session:
+        release_tracker_leases(database_session, DISCOVERY_JOB, first_claim, second_worker)
+        database_session.commit()
+    # Releasing another worker's leases is a no-op.
+    remaining_claim = claim(session_factory, second_worker, limit=len(due_tracker_ids))
+    assert remaining_claim == due_tracker_ids[2 * CLAIM_BATCH_SIZE :]
+
+    with session_factory() as database_session:
+        release_tracker_leases(database_session, DISCOVERY_JOB, first_claim, first_worker)
+        database_session.commit()
+    assert claim(session_factory, second_worker) == first_claim
+
+def test_expired_lease_of_crashed_worker_is_taken_over(
+    session_factory: sessionmaker, due_tracker_ids: list[int]
+) -> None:
+    crashed_worker, surviving_worker = make_worker_identity(), make_worker_identity()
+    crashed_claim = claim(session_factory, crashed_worker)
+    expire_all_leases(session_factory)
+
+    assert claim(session_factory, surviving_worker) == crashed_claim
+    with session_factory() as database_session:
+        lease_owners = set(
+            database_session.execute(
+                select(WorkLease.owner).where(WorkLease.tracker_id.in_(crashed_claim))
+            ).scalars()
+        )
+    assert lease_owners == {surviving_worker}
+
+def test_extended_lease_is_not_taken_over(session_factory: sessionmaker, due_tracker_ids: list[int]) -> None:
+    first_worker, second_worker = make_worker_identity(), make_worker_identity()
+    first_claim = claim(session_factory, first_worker, job_kind=SNAPSHOT_JOB)
+    expire_all_leases(session_factory)
+    with session_factory() as database_session:
+        extend_tracker_leases(database_session, SNAPSHOT_JOB, first_claim, first_worker, LEASE_SECONDS)
+        database_session.commit()
+
+    second_claim = claim(session_factory, second_worker, job_kind=SNAPSHOT_JOB)
+    assert second_claim == due_tracker_ids[CLAIM_BATCH_SIZE : 2 * CLAIM_BATCH_SIZE]
+
+@pytest.mark.parametrize("job_kind", [DISCOVERY_JOB, SNAPSHOT_JOB])
+def test_leases_are_held_per_job_kind(
+    session_factory: sessionmaker, due_tracker_ids: list[int], job_kind: str
+) -> None:
+    other_job_kind = SNAPSHOT_JOB if job_kind == DISCOVERY_JOB else DISCOVERY_JOB
+    worker_identity = make_worker_identity()
+    assert claim(session_factory, worker_identity, job_kind=job_kind) == due_tracker_ids[:CLAIM_BATCH_SIZE]
+    assert claim(session_factory, worker_identity, job_kind=other_job_kind) == due_tracker_ids[:CLAIM_BATCH_SIZE]
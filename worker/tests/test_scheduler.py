@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+
+from yta_worker.services.leases import DISCOVERY_JOB, SNAPSHOT_JOB
+from yta_worker.services.scheduler import TrackerDeadlineQueue
+
+START_TIME = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+def at_minute(minute: int) -> datetime:
+    return START_TIME + timedelta(minutes=minute)
+
+def test_empty_queue_has_no_deadline() -> None:
+    deadline_queue = TrackerDeadlineQueue()
+    assert deadline_queue.next_deadline() is None
+    assert deadline_queue.pop_due_job_kinds(at_minute(60)) == set()
+
+def test_next_deadline_is_earliest_job_of_any_tracker() -> None:
+    deadline_queue = TrackerDeadlineQueue()
+    deadline_queue.replace_all([(1, at_minute(30), at_minute(10)), (2, at_minute(5), None), (3, None, None)])
+    assert deadline_queue.next_deadline() == at_minute(5)
+
+def test_pop_due_returns_job_kinds_up_to_now_and_keeps_later_ones() -> None:
+    deadline_queue = TrackerDeadlineQueue()
+    deadline_queue.replace_all([(1, at_minute(30), at_minute(10)), (2, at_minute(5), at_minute(40))])
+
+    assert deadline_queue.pop_due_job_kinds(at_minute(4)) == set()
+    assert deadline_queue.pop_due_job_kinds(at_minute(10)) == {DISCOVERY_JOB, SNAPSHOT_JOB}
+    assert deadline_queue.next_deadline() == at_minute(30)
+    assert deadline_queue.pop_due_job_kinds(at_minute(30)) == {DISCOVERY_JOB}
+    assert deadline_queue.next_deadline() == at_minute(40)
+
+def test_update_supersedes_old_deadlines_lazily() -> None:
+    deadline_queue = TrackerDeadlineQueue()
+    deadline_queue.replace_all([(1, at_minute(5), at_minute(5)), (2, at_minute(20), at_minute(20))])
+
+    deadline_queue.update([1], [(1, at_minute(60), at_minute(15))])
+    assert deadline_queue.next_deadline() == at_minute(15)
+    # The stale minute-5 entries are still in the heap but must not fire.
+    assert deadline_queue.pop_due_job_kinds(at_minute(10)) == set()
+    assert deadline_queue.pop_due_job_kinds(at_minute(15)) == {SNAPSHOT_JOB}
+
+def test_update_without_row_drops_deactivated_tracker() -> None:
+    deadline_queue = TrackerDeadlineQueue()
+    deadline_queue.replace_all([(1, at_minute(5), at_minute(5)), (2, at_minute(20), None)])
+
+    deadline_queue.update([1], [])
+    assert deadline_queue.next_deadline() == at_minute(20)
+    assert deadline_queue.pop_due_job_kinds(at_minute(10)) == set()
+
+def test_update_adds_new_tracker() -> None:
+    deadline_queue = TrackerDeadlineQueue()
+    deadline_queue.replace_all([(1, at_minute(30), at_minute(30))])
+
+    deadline_queue.update([2], [(2, at_minute(0), at_minute(0))])
+    assert deadline_queue.next_deadline() == at_minute(0)
+    assert deadline_queue.pop_due_job_kinds(at_minute(0)) == {DISCOVERY_JOB, SNAPSHOT_JOB}
+
+def test_replace_all_discards_previous_deadlines() -> None:
+    deadline_queue = TrackerDeadlineQueue()
+    deadline_queue.replace_all([(1, at_minute(5), at_minute(5))])
+
+    deadline_queue.replace_all([(2, at_minute(50), None)])
+    assert deadline_queue.pop_due_job_kinds(at_minute(10)) == set()
+    assert deadline_queue.next_deadline() == at_minute(50)
+
+def test_moving_deadline_back_to_an_earlier_value_fires_once() -> None:
+    deadline_queue = TrackerDeadlineQueue()
+    deadline_queue.replace_all([(1, at_minute(5), None)])
+    deadline_queue.update([1], [(1, at_minute(50), None)])
+    deadline_queue.update([1], [(1, at_minute(5), None)])
+
+    assert deadline_queue.pop_due_job_kinds(at_minute(5)) == {DISCOVERY_JOB}
+    assert deadline_queue.next_deadline() is None